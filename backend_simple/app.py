@@ -1,17 +1,20 @@
 from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException, status, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 import numpy as np
 import os
 import io
 import tempfile
+import shutil
+import signal
+import socket
+import queue
 import sqlite3
 import re
 from PIL import Image
 from PIL import ImageDraw
-import pytesseract
 from langdetect import detect
 # Offline translation (preferred). Falls back to no-translate if unavailable
 try:
@@ -20,15 +23,40 @@ try:
 except Exception:
     argos_package = None  # type: ignore
     argos_translate = None  # type: ignore
+
+# Async HTTP client for Ollama (optional)
+try:
+    import httpx  # type: ignore
+except Exception:
+    httpx = None  # type: ignore
 from pydantic import BaseModel, EmailStr
 from datetime import datetime, timedelta
 import bcrypt
 import jwt
-from PyPDF2 import PdfReader, PdfWriter
 import fitz  # PyMuPDF
 import pyotp
 import subprocess
 import requests
+import json
+import logging
+import random
+import functools
+import asyncio
+import base64
+import bisect
+import threading
+import uuid
+import hashlib
+import zlib
+import time
+import multiprocessing
+import mimetypes
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger("community")
 
 DB_PATH = os.environ.get("COMMUNITY_DB", "/opt/foi-archive/community.db")
 DATA_DIR = os.environ.get("COMMUNITY_DATA", "/opt/foi-archive/data")
@@ -47,9 +75,54 @@ app.add_middleware(
 )
 
 
+# SQLite connections are reused per thread: get_db() hands out an idle connection
+# of the calling thread (or opens one with tuned pragmas), and close() returns it.
+# Reuse also keeps sqlite3's per-connection prepared-statement cache warm.
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_KB = int(os.environ.get("SQLITE_CACHE_KB", "65536"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_IDLE_PER_THREAD = 2
+SQLITE_CACHED_STATEMENTS = 256
+
+_db_local = threading.local()
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to its thread's idle list."""
+
+    def close(self) -> None:
+        try:
+            if self.in_transaction:
+                self.rollback()
+            # Callers may switch to manual transactions (BEGIN IMMEDIATE); restore the default
+            self.isolation_level = ""
+            idle = getattr(_db_local, "idle", None)
+            if idle is not None and self not in idle and len(idle) < SQLITE_IDLE_PER_THREAD:
+                idle.append(self)
+                return
+        except sqlite3.ProgrammingError:
+            pass
+        super().close()
+
+
 def get_db() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
+    idle = getattr(_db_local, "idle", None)
+    if idle is None:
+        idle = _db_local.idle = []
+    if idle:
+        return idle.pop()
+    conn = sqlite3.connect(
+        DB_PATH,
+        factory=PooledConnection,
+        timeout=SQLITE_BUSY_TIMEOUT_MS / 1000.0,
+        cached_statements=SQLITE_CACHED_STATEMENTS,
+    )
     conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE};")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB};")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS};")
     return conn
 
 
@@ -83,7 +156,10 @@ def init_db():
         cur.execute("ALTER TABLE users ADD COLUMN mfa_enabled INTEGER DEFAULT 0")
     except Exception:
         pass
-    # Ensure FTS sync trigger
+    # Ensure FTS sync trigger; updates of other columns (lang, hashes) must not rewrite the FTS row
+    row = cur.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'docs_au'").fetchone()
+    if row and "UPDATE OF" not in row[0]:
+        cur.execute("DROP TRIGGER docs_au")
     cur.executescript(
         """
         CREATE TRIGGER IF NOT EXISTS docs_ai AFTER INSERT ON docs BEGIN
@@ -92,7 +168,7 @@ def init_db():
         CREATE TRIGGER IF NOT EXISTS docs_ad AFTER DELETE ON docs BEGIN
           INSERT INTO docs_fts(docs_fts, rowid, filename, text, translated) VALUES('delete', old.id, old.filename, old.text, old.translated);
         END;
-        CREATE TRIGGER IF NOT EXISTS docs_au AFTER UPDATE ON docs BEGIN
+        CREATE TRIGGER IF NOT EXISTS docs_au AFTER UPDATE OF filename, text, translated ON docs BEGIN
           INSERT INTO docs_fts(docs_fts, rowid, filename, text, translated) VALUES('delete', old.id, old.filename, old.text, old.translated);
           INSERT INTO docs_fts(rowid, filename, text, translated) VALUES (new.id, new.filename, new.text, new.translated);
         END;
@@ -161,11 +237,572 @@ def init_db():
         """
     )
     cur.execute("CREATE INDEX IF NOT EXISTS idx_highlights_doc ON highlights(doc_id)")
+    # Durable ingestion queue: one row per uploaded file, advanced stage by stage by the workers
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY,
+            status TEXT NOT NULL CHECK(status IN ('queued','running','done','failed')) DEFAULT 'queued',
+            stage TEXT NOT NULL DEFAULT 'convert',
+            original_filename TEXT NOT NULL,
+            raw_path TEXT NOT NULL,
+            canonical_path TEXT,
+            text TEXT,
+            lang TEXT,
+            translated TEXT,
+            doc_id INTEGER,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            owner_email TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id)")
+    # OpenKM outbox: files waiting to be uploaded by the background senders
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS openkm_outbox (
+            id INTEGER PRIMARY KEY,
+            status TEXT NOT NULL CHECK(status IN ('pending','sending','sent','failed')) DEFAULT 'pending',
+            local_path TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            dst_dir TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            okm_path TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_openkm_outbox_due ON openkm_outbox(status, next_attempt_at)")
+    # Content hashes for upload deduplication (raw upload bytes and canonical PDF)
+    for ddl in (
+        "ALTER TABLE docs ADD COLUMN content_sha256 TEXT",
+        "ALTER TABLE docs ADD COLUMN pdf_sha256 TEXT",
+        "ALTER TABLE jobs ADD COLUMN content_sha256 TEXT",
+        "ALTER TABLE jobs ADD COLUMN pdf_sha256 TEXT",
+        "ALTER TABLE jobs ADD COLUMN duplicate INTEGER DEFAULT 0",
+        # Per-page checkpoints (JSON lists) so passages keep their page numbers
+        "ALTER TABLE jobs ADD COLUMN page_texts TEXT",
+        "ALTER TABLE jobs ADD COLUMN page_translations TEXT",
+        "ALTER TABLE jobs ADD COLUMN page_words BLOB",
+        # Ingestion time, for date-filtered search
+        "ALTER TABLE docs ADD COLUMN created_at TEXT",
+    ):
+        try:
+            cur.execute(ddl)
+        except Exception:
+            pass
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_docs_content_sha ON docs(content_sha256)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_docs_pdf_sha ON docs(pdf_sha256)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_docs_lang_created ON docs(lang, created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_content_sha ON jobs(content_sha256)")
+    # Local vector index metadata (used when pgvector is not configured); `row` is the matrix row
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS local_passages (
+            row INTEGER PRIMARY KEY,
+            doc_id INTEGER NOT NULL,
+            passage_no INTEGER NOT NULL,
+            page INTEGER,
+            text TEXT NOT NULL,
+            scale REAL NOT NULL DEFAULT 1.0,
+            deleted INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_local_passages_doc ON local_passages(doc_id, deleted)")
+    cur.execute("CREATE TABLE IF NOT EXISTS local_vector_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    # Per-document revisions for cache invalidation; every write takes a fresh, never reused number
+    cur.execute("CREATE TABLE IF NOT EXISTS doc_revisions (doc_id INTEGER PRIMARY KEY, revision INTEGER NOT NULL)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_doc_revisions_rev ON doc_revisions(revision)")
+    cur.executescript(
+        """
+        CREATE TRIGGER IF NOT EXISTS docs_rev_ai AFTER INSERT ON docs BEGIN
+          INSERT OR REPLACE INTO doc_revisions(doc_id, revision) VALUES (new.id, (SELECT COALESCE(MAX(revision), 0) + 1 FROM doc_revisions));
+        END;
+        CREATE TRIGGER IF NOT EXISTS docs_rev_au AFTER UPDATE ON docs BEGIN
+          INSERT OR REPLACE INTO doc_revisions(doc_id, revision) VALUES (new.id, (SELECT COALESCE(MAX(revision), 0) + 1 FROM doc_revisions));
+        END;
+        CREATE TRIGGER IF NOT EXISTS docs_rev_ad AFTER DELETE ON docs BEGIN
+          INSERT OR REPLACE INTO doc_revisions(doc_id, revision) VALUES (old.id, (SELECT COALESCE(MAX(revision), 0) + 1 FROM doc_revisions));
+        END;
+        CREATE TRIGGER IF NOT EXISTS doc_tags_rev_ai AFTER INSERT ON doc_tags BEGIN
+          INSERT OR REPLACE INTO doc_revisions(doc_id, revision) VALUES (new.doc_id, (SELECT COALESCE(MAX(revision), 0) + 1 FROM doc_revisions));
+        END;
+        CREATE TRIGGER IF NOT EXISTS doc_tags_rev_ad AFTER DELETE ON doc_tags BEGIN
+          INSERT OR REPLACE INTO doc_revisions(doc_id, revision) VALUES (old.doc_id, (SELECT COALESCE(MAX(revision), 0) + 1 FROM doc_revisions));
+        END;
+        """
+    )
+    cur.execute("INSERT OR IGNORE INTO doc_revisions(doc_id, revision) SELECT id, 0 FROM docs")
+    # Per-page text with its own FTS index, so hits carry page numbers and a page can be
+    # reprocessed without rewriting the whole document. `docs.text`/`docs.translated` stay
+    # the joined pages for the document-level endpoints.
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS doc_pages (
+            id INTEGER PRIMARY KEY,
+            doc_id INTEGER NOT NULL,
+            page INTEGER NOT NULL,
+            text TEXT NOT NULL DEFAULT '',
+            translated TEXT NOT NULL DEFAULT '',
+            UNIQUE(doc_id, page)
+        )
+        """
+    )
+    # Word boxes (see pack_words), kept so matches map to page rectangles without re-OCR
+    try:
+        cur.execute("ALTER TABLE doc_pages ADD COLUMN words BLOB")
+    except Exception:
+        pass
+    cur.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS doc_pages_fts USING fts5(text, translated, content='doc_pages', content_rowid='id')"
+    )
+    cur.executescript(
+        """
+        CREATE TRIGGER IF NOT EXISTS doc_pages_ai AFTER INSERT ON doc_pages BEGIN
+          INSERT INTO doc_pages_fts(rowid, text, translated) VALUES (new.id, new.text, new.translated);
+        END;
+        CREATE TRIGGER IF NOT EXISTS doc_pages_ad AFTER DELETE ON doc_pages BEGIN
+          INSERT INTO doc_pages_fts(doc_pages_fts, rowid, text, translated) VALUES('delete', old.id, old.text, old.translated);
+        END;
+        CREATE TRIGGER IF NOT EXISTS doc_pages_au AFTER UPDATE OF text, translated ON doc_pages BEGIN
+          INSERT INTO doc_pages_fts(doc_pages_fts, rowid, text, translated) VALUES('delete', old.id, old.text, old.translated);
+          INSERT INTO doc_pages_fts(rowid, text, translated) VALUES (new.id, new.text, new.translated);
+        END;
+        CREATE TRIGGER IF NOT EXISTS docs_pages_ad AFTER DELETE ON docs BEGIN
+          DELETE FROM doc_pages WHERE doc_id = old.id;
+        END;
+        """
+    )
     conn.commit()
     conn.close()
 
 
 init_db()
+
+# ==================== In-process Caches ====================
+class TTLCache:
+    """Thread-safe LRU with per-entry expiry and hit/miss counters."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data: "OrderedDict[object, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None, validate=None):
+        """`validate(value) -> bool` can reject an entry whose sources changed since it was stored."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or (self.ttl > 0 and item[0] < time.monotonic()):
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+        if validate is not None and not validate(item[1]):
+            with self._lock:
+                if self._data.get(key) is item:
+                    del self._data[key]
+                self.misses += 1
+                self.invalidations += 1
+            return default
+        with self._lock:
+            self.hits += 1
+        return item[1]
+
+    def put(self, key, value, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+class FileCache:
+    """Directory of derived files named by key, evicted least-recently-used (by mtime) past `max_bytes`.
+    Serve entries with OpenFileResponse: it holds the file open, so eviction can't cut off a download."""
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str = "", min_age_seconds: float = 60.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        # Entries returned by get()/commit() this recently are kept, so the caller can open them first
+        self.min_age_seconds = min_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def tmp_path(self, key: str) -> str:
+        return os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}.tmp{self.suffix}")
+
+    def commit(self, tmp_path: str, key: str) -> str:
+        """Move a finished temp file (from `tmp_path`) into the cache and evict if over budget."""
+        path = self.path_for(key)
+        os.replace(tmp_path, path)
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: str) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+            if total <= self.max_bytes:
+                return
+            # Trim to 90% so we don't evict again on the very next insert
+            recent = time.time() - self.min_age_seconds
+            for mtime, size, path in sorted(entries):
+                if total <= self.max_bytes * 0.9:
+                    break
+                if path == keep or mtime >= recent:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+
+class OpenFileResponse(StreamingResponse):
+    """Like FileResponse, but the file is opened when the response is created, not when sending
+    starts: once open, the data stays readable even if the path is unlinked meanwhile."""
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, path: str, filename: Optional[str] = None, media_type: Optional[str] = None, headers: Optional[Dict[str, str]] = None):
+        self.file = open(path, "rb")
+        try:
+            size = os.fstat(self.file.fileno()).st_size
+            media_type = media_type or mimetypes.guess_type(filename or path)[0] or "application/octet-stream"
+            super().__init__(iter(lambda: self.file.read(self.chunk_size), b""), media_type=media_type, headers=headers)
+        except BaseException:
+            self.file.close()
+            raise
+        self.headers["content-length"] = str(size)
+        if filename is not None:
+            quoted = urllib.parse.quote(filename)
+            self.headers.setdefault(
+                "content-disposition",
+                f'attachment; filename="{filename}"' if quoted == filename else f"attachment; filename*=utf-8''{quoted}",
+            )
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.file.close()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (RFC 9110 weak comparison): `*` or any listed tag equal to `etag`."""
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in (if_none_match or "").split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+_content_hashes = TTLCache(1024, 0)
+
+
+def file_sha256(path: str) -> str:
+    """sha256 of a file, memoized per (path, mtime, size) so stored originals are hashed once."""
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    digest = _content_hashes.get(key)
+    if digest is None:
+        digest = sha256_file(path)
+        _content_hashes.put(key, digest)
+    return digest
+
+
+def doc_revisions(doc_ids) -> Dict[int, int]:
+    """Current revision of each document; maintained by triggers on `docs` (deleted docs get a tombstone revision)."""
+    ids = sorted({int(i) for i in doc_ids})
+    if not ids:
+        return {}
+    conn = get_db()
+    rows = conn.execute(
+        f"SELECT doc_id, revision FROM doc_revisions WHERE doc_id IN ({','.join('?' * len(ids))})", ids
+    ).fetchall()
+    conn.close()
+    return {r[0]: r[1] for r in rows}
+
+
+def corpus_revision() -> int:
+    """Corpus generation: the highest document revision, bumped by every insert/update/delete on `docs`."""
+    conn = get_db()
+    row = conn.execute("SELECT MAX(revision) FROM doc_revisions").fetchone()
+    conn.close()
+    return int(row[0] or 0)
+
+
+def touch_doc_revision(doc_id: int) -> None:
+    """Bump a document's revision for changes made outside `docs` (e.g. its passage embeddings)."""
+    conn = get_db()
+    conn.execute(
+        "INSERT OR REPLACE INTO doc_revisions(doc_id, revision) VALUES(?, (SELECT COALESCE(MAX(revision), 0) + 1 FROM doc_revisions))",
+        (doc_id,),
+    )
+    conn.commit()
+    conn.close()
+
+
+def cached_by_generation(cache: TTLCache, key, compute):
+    """Serve `compute()` from `cache` while the corpus generation is unchanged. None results are not cached."""
+    generation = corpus_revision()
+    entry = cache.get(key, validate=lambda v: v[0] == generation)
+    if entry is not None:
+        return entry[1]
+    value = compute()
+    if value is not None:
+        cache.put(key, (generation, value))
+    return value
+
+
+# Query vectors depend only on the text and the model, so they never go stale
+QUERY_VECTOR_CACHE_SIZE = int(os.environ.get("QUERY_VECTOR_CACHE_SIZE", "2048"))
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", "600"))
+query_vector_cache = TTLCache(QUERY_VECTOR_CACHE_SIZE, 0)
+search_result_cache = TTLCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+semantic_result_cache = TTLCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+
+
+# ==================== Executors ====================
+# Blocking work never runs on the event loop: SQLite calls go to the DB pool,
+# PDF/image processing, hashing and bcrypt to the CPU pool, and synchronous
+# outbound HTTP to the HTTP pool. Each pool is bounded and reports its queue depth.
+DB_THREADS = int(os.environ.get("DB_THREADS", "8"))
+CPU_THREADS = int(os.environ.get("CPU_THREADS", "0")) or (os.cpu_count() or 1)
+HTTP_THREADS = int(os.environ.get("HTTP_THREADS", "16"))
+
+
+class BoundedExecutor:
+    """Named thread pool with queued/active/completed counters."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.max_queued = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-worker")
+
+    def _call(self, fn, args, kwargs):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    def _on_done(self, fut) -> None:
+        # A job cancelled before it started never reaches _call
+        if fut.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        fut = self._executor.submit(self._call, fn, args, kwargs)
+        fut.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(fut)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers, "queued": self.queued, "active": self.active,
+                "completed": self.completed, "max_queued": self.max_queued,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+db_executor = BoundedExecutor("db", DB_THREADS)
+cpu_executor = BoundedExecutor("cpu", CPU_THREADS)
+http_executor = BoundedExecutor("http", HTTP_THREADS)
+
+
+def offload(executor: BoundedExecutor):
+    """Run a synchronous endpoint on `executor`; FastAPI still sees the original signature."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def handler(*args, **kwargs):
+            return await executor.run(fn, *args, **kwargs)
+        return handler
+    return decorate
+
+
+@app.on_event("shutdown")
+async def _shutdown_executors():
+    for executor in (db_executor, cpu_executor, http_executor):
+        executor.shutdown()
+
+
+# Offline translation: translators are built once per language pair, documents are
+# split into paragraph/sentence chunks, and chunk translations are memoized so
+# boilerplate repeated on every page (headers, footers, stamps) is translated once.
+TRANSLATE_CHUNK_CHARS = int(os.environ.get("TRANSLATE_CHUNK_CHARS", "1000"))
+TRANSLATE_WORKERS = max(1, int(os.environ.get("TRANSLATE_WORKERS", "1")))
+TRANSLATION_MEMORY_SIZE = int(os.environ.get("TRANSLATION_MEMORY_SIZE", "5000"))
+
+_translators: Dict[str, object] = {}
+_translators_lock = threading.Lock()
+_translation_memory: "OrderedDict[str, str]" = OrderedDict()
+_translation_memory_lock = threading.Lock()
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。؟])\s+")
+
+
+def get_translator(from_code: str, to_code: str = "en"):
+    key = f"{from_code}->{to_code}"
+    with _translators_lock:
+        if key not in _translators:
+            installed = argos_translate.get_installed_languages()
+            available_from = [l for l in installed if l.code == from_code]
+            available_to = [l for l in installed if l.code == to_code]
+            translator = None
+            if available_from and available_to:
+                translator = available_from[0].get_translation(available_to[0])
+            _translators[key] = translator
+        return _translators[key]
+
+
+def split_for_translation(text: str, max_chars: int = TRANSLATE_CHUNK_CHARS) -> List[List[str]]:
+    """Split text into paragraphs, each a list of chunks of at most ~max_chars (sentence-aligned)."""
+    paragraphs: List[List[str]] = []
+    for para in re.split(r"\n\s*\n", text):
+        para = para.strip()
+        if not para:
+            continue
+        if len(para) <= max_chars:
+            paragraphs.append([para])
+            continue
+        chunks: List[str] = []
+        current = ""
+        for sentence in _SENTENCE_SPLIT.split(para):
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            chunks.append(current)
+        paragraphs.append(chunks)
+    return paragraphs
+
+
+def _memory_get(key: str) -> Optional[str]:
+    with _translation_memory_lock:
+        hit = _translation_memory.get(key)
+        if hit is not None:
+            _translation_memory.move_to_end(key)
+        return hit
+
+
+def _memory_put(key: str, value: str) -> None:
+    if TRANSLATION_MEMORY_SIZE <= 0:
+        return
+    with _translation_memory_lock:
+        _translation_memory[key] = value
+        _translation_memory.move_to_end(key)
+        while len(_translation_memory) > TRANSLATION_MEMORY_SIZE:
+            _translation_memory.popitem(last=False)
+
+
+def translate_chunks(translator, from_code: str, chunks: List[str]) -> Dict[str, str]:
+    """Translate unique chunks once each, consulting the translation memory first."""
+    out: Dict[str, str] = {}
+    todo: List[str] = []
+    for chunk in dict.fromkeys(chunks):
+        if not any(c.isalpha() for c in chunk):
+            # Page numbers, dates, reference codes: nothing to translate
+            out[chunk] = chunk
+            continue
+        hit = _memory_get(f"{from_code}:{chunk}")
+        if hit is not None:
+            out[chunk] = hit
+        else:
+            todo.append(chunk)
+
+    def _one(chunk: str) -> str:
+        try:
+            return translator.translate(chunk)
+        except Exception:
+            return chunk
+
+    if TRANSLATE_WORKERS > 1 and len(todo) > 1:
+        with ThreadPoolExecutor(max_workers=TRANSLATE_WORKERS) as pool:
+            translated = list(pool.map(_one, todo))
+    else:
+        translated = [_one(c) for c in todo]
+    for chunk, result in zip(todo, translated):
+        out[chunk] = result
+        _memory_put(f"{from_code}:{chunk}", result)
+    return out
+
+
 def translate_to_english_offline(text: str, detected_lang: Optional[str]) -> str:
     if not text:
         return text
@@ -179,12 +816,12 @@ def translate_to_english_offline(text: str, detected_lang: Optional[str]) -> str
         # Argos doesn't support "auto"; try best effort map
         if from_lang_code == "auto":
             from_lang_code = "en"
-        available_from = [l for l in argos_translate.get_installed_languages() if l.code == from_lang_code]
-        available_to = [l for l in argos_translate.get_installed_languages() if l.code == "en"]
-        if not available_from or not available_to:
+        translator = get_translator(from_lang_code, "en")
+        if translator is None:
             return text
-        translator = available_from[0].get_translation(available_to[0])
-        return translator.translate(text)
+        paragraphs = split_for_translation(text)
+        done = translate_chunks(translator, from_lang_code, [c for para in paragraphs for c in para])
+        return "\n\n".join(" ".join(done[c] for c in para) for para in paragraphs)
     except Exception:
         return text
 
@@ -204,16 +841,101 @@ def get_embedder():
         _embedder = SentenceTransformer("all-MiniLM-L6-v2")
     return _embedder
 
-def get_pg_conn():
+# Process-wide pool: connections to the (TLS) DBaaS are reused across requests.
+# Callers hand connections back with release_pg_conn(); idle connections are
+# health-checked on checkout and replaced if the server dropped them.
+PG_POOL_MIN = int(os.environ.get("PG_POOL_MIN", "1"))
+PG_POOL_MAX = max(1, int(os.environ.get("PG_POOL_MAX", "10")))
+PG_HEALTHCHECK_IDLE_SECONDS = float(os.environ.get("PG_HEALTHCHECK_IDLE_SECONDS", "30"))
+# Vector index: "hnsw" (default), "ivfflat" or "none"; search-time recall knobs below
+PGVECTOR_INDEX = os.environ.get("PGVECTOR_INDEX", "hnsw").lower()
+PGVECTOR_HNSW_M = int(os.environ.get("PGVECTOR_HNSW_M", "16"))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(os.environ.get("PGVECTOR_HNSW_EF_CONSTRUCTION", "64"))
+PGVECTOR_EF_SEARCH = int(os.environ.get("PGVECTOR_EF_SEARCH", "40"))
+PGVECTOR_IVF_LISTS = int(os.environ.get("PGVECTOR_IVF_LISTS", "100"))
+PGVECTOR_IVF_PROBES = int(os.environ.get("PGVECTOR_IVF_PROBES", "10"))
+
+_pg_pool = None
+_pg_pool_lock = threading.Lock()
+_pg_slots = threading.BoundedSemaphore(PG_POOL_MAX)
+_pg_last_used: Dict[int, float] = {}
+
+
+def _get_pg_pool():
+    global _pg_pool
     if psycopg2 is None:
         return None
     uri = os.environ.get("POSTGRES_RAG_URI")
     if not uri:
         return None
+    with _pg_pool_lock:
+        if _pg_pool is None:
+            from psycopg2.pool import ThreadedConnectionPool  # type: ignore
+            _pg_pool = ThreadedConnectionPool(
+                min(PG_POOL_MIN, PG_POOL_MAX), PG_POOL_MAX, uri,
+                keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3,
+            )
+        return _pg_pool
+
+
+def get_pg_conn():
     try:
-        return psycopg2.connect(uri)
+        pool = _get_pg_pool()
     except Exception:
         return None
+    if pool is None:
+        return None
+    # The pool raises when exhausted; the semaphore makes callers wait for a free slot instead
+    if not _pg_slots.acquire(timeout=30):
+        return None
+    try:
+        for _ in range(2):
+            conn = pool.getconn()
+            idle = time.time() - _pg_last_used.get(id(conn), 0.0)
+            if not conn.closed and idle < PG_HEALTHCHECK_IDLE_SECONDS:
+                return conn
+            try:
+                if not conn.closed:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT 1")
+                    conn.rollback()
+                    return conn
+            except Exception:
+                pass
+            # Dead connection: drop it from the pool and try a fresh one
+            _pg_last_used.pop(id(conn), None)
+            pool.putconn(conn, close=True)
+    except Exception:
+        pass
+    _pg_slots.release()
+    return None
+
+
+def release_pg_conn(conn) -> None:
+    if conn is None:
+        return
+    pool = _pg_pool
+    try:
+        if pool is None:
+            conn.close()
+            return
+        broken = bool(conn.closed)
+        if not broken:
+            try:
+                # Never hand out a connection with an open (or aborted) transaction
+                conn.rollback()
+            except Exception:
+                broken = True
+        if broken:
+            _pg_last_used.pop(id(conn), None)
+        else:
+            _pg_last_used[id(conn)] = time.time()
+        pool.putconn(conn, close=broken)
+    except Exception:
+        pass
+    finally:
+        _pg_slots.release()
+
 
 def ensure_pg_schema():
     conn = get_pg_conn()
@@ -225,6 +947,9 @@ def ensure_pg_schema():
         cur.execute(
             f"CREATE TABLE IF NOT EXISTS doc_embeddings (doc_id INTEGER PRIMARY KEY, filename TEXT NOT NULL, embedding vector({EMBEDDING_DIM}))"
         )
+        cur.execute(
+            f"CREATE TABLE IF NOT EXISTS doc_passages (doc_id INTEGER NOT NULL, passage_no INTEGER NOT NULL, page INTEGER, text TEXT NOT NULL, embedding vector({EMBEDDING_DIM}), PRIMARY KEY(doc_id, passage_no))"
+        )
         conn.commit()
     except Exception:
         pass
@@ -233,16 +958,520 @@ def ensure_pg_schema():
             cur.close()
         except Exception:
             pass
-        conn.close()
+        release_pg_conn(conn)
+
+
+def _pg_int_param(name: str, value, low: int, high: int) -> int:
+    # Index parameters end up in DDL text, so only plain in-range integers get that far
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+    if str(n) != str(value).strip() or not low <= n <= high:
+        raise ValueError(f"{name} must be an integer between {low} and {high}, got {value!r}")
+    return n
+
+
+def create_pg_vector_indexes() -> Dict[str, str]:
+    """Build the approximate nearest-neighbour index (PGVECTOR_INDEX) on both embedding tables, so
+    `ORDER BY embedding <-> q` stops being a sequential scan. An admin step (`python app.py
+    create-vector-indexes`), not startup: CREATE INDEX CONCURRENTLY can take minutes on a large
+    table and must run outside a transaction, but doesn't block writes meanwhile."""
+    if PGVECTOR_INDEX == "hnsw":
+        m = _pg_int_param("PGVECTOR_HNSW_M", PGVECTOR_HNSW_M, 2, 100)
+        ef = _pg_int_param("PGVECTOR_HNSW_EF_CONSTRUCTION", PGVECTOR_HNSW_EF_CONSTRUCTION, 4, 1000)
+        method, options = "hnsw", f"m = {m}, ef_construction = {ef}"
+    elif PGVECTOR_INDEX == "ivfflat":
+        lists = _pg_int_param("PGVECTOR_IVF_LISTS", PGVECTOR_IVF_LISTS, 1, 32768)
+        method, options = "ivfflat", f"lists = {lists}"
+    else:
+        return {}
+    conn = get_pg_conn()
+    if conn is None:
+        raise RuntimeError("Postgres is not configured or unreachable (POSTGRES_RAG_URI)")
+    result: Dict[str, str] = {}
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for table in ("doc_passages", "doc_embeddings"):
+                index = f"{table}_embedding_{method}"
+                # An interrupted concurrent build leaves an INVALID index that IF NOT EXISTS would keep
+                cur.execute(
+                    "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = %s",
+                    (index,),
+                )
+                row = cur.fetchone()
+                if row and row[0]:
+                    result[table] = "exists"
+                    continue
+                if row:
+                    cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+                cur.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {table} USING {method} (embedding vector_l2_ops) WITH ({options})"
+                )
+                result[table] = "created"
+    finally:
+        try:
+            conn.autocommit = False
+        except Exception:
+            pass
+        release_pg_conn(conn)
+    return result
+
+
+@app.on_event("shutdown")
+async def _shutdown_pg_pool():
+    if _pg_pool is not None:
+        try:
+            _pg_pool.closeall()
+        except Exception:
+            pass
+
+
+def set_pg_search_params(cur) -> None:
+    """Per-transaction recall/speed trade-off for the ANN index."""
+    if PGVECTOR_INDEX == "hnsw":
+        cur.execute("SET LOCAL hnsw.ef_search = %s", (_pg_int_param("PGVECTOR_EF_SEARCH", PGVECTOR_EF_SEARCH, 1, 1000),))
+    elif PGVECTOR_INDEX == "ivfflat":
+        cur.execute("SET LOCAL ivfflat.probes = %s", (_pg_int_param("PGVECTOR_IVF_PROBES", PGVECTOR_IVF_PROBES, 1, 32768),))
 
 ensure_pg_schema()
 
 
+# Passage index: documents are split into overlapping, page-attributed passages at
+# ingest and embedded in batches, so retrieval (semantic search, QA) works on
+# passages that fit the embedder's window instead of whole-document vectors.
+PASSAGE_CHARS = int(os.environ.get("PASSAGE_CHARS", "800"))
+PASSAGE_OVERLAP = int(os.environ.get("PASSAGE_OVERLAP", "150"))
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "32"))
+
+
+def pgvector_literal(vec) -> str:
+    return "[" + ",".join(f"{float(x):.7g}" for x in vec) + "]"
+
+
+def split_passages(pages: List[str], size: int = PASSAGE_CHARS, overlap: int = PASSAGE_OVERLAP) -> List[Dict]:
+    """Split per-page text into overlapping word-aligned windows: [{"page", "text"}] (1-based pages)."""
+    passages: List[Dict] = []
+    for page_no, page_text in enumerate(pages, start=1):
+        words = (page_text or "").split()
+        start = 0
+        while start < len(words):
+            length = 0
+            end = start
+            while end < len(words) and (length == 0 or length + 1 + len(words[end]) <= size):
+                length += len(words[end]) + (1 if length else 0)
+                end += 1
+            passages.append({"page": page_no, "text": " ".join(words[start:end])})
+            if end >= len(words):
+                break
+            # Step back roughly `overlap` characters so context spans window boundaries
+            back = 0
+            next_start = end
+            while next_start > start + 1 and back < overlap:
+                next_start -= 1
+                back += len(words[next_start]) + 1
+            start = next_start
+    return passages
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    model = get_embedder()
+    vecs = model.encode(texts, batch_size=EMBED_BATCH_SIZE, show_progress_bar=False)
+    return np.asarray(vecs, dtype=np.float32).reshape(len(texts), EMBEDDING_DIM)
+
+
+def index_doc_passages(doc_id: int, filename: str, pages: List[str], page_numbers: bool = True) -> int:
+    """(Re)build the passage embeddings of one document (pgvector, else the local index). Returns passage count."""
+    if not pgvector_configured():
+        if not local_vectors_enabled():
+            return 0
+        passages = split_passages(pages)
+        if not page_numbers:
+            for p in passages:
+                p["page"] = None
+        vecs = embed_texts([p["text"] for p in passages]) if passages else np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        return local_vectors.add_doc(doc_id, passages, vecs)
+    pg = get_pg_conn()
+    if pg is None:
+        return 0
+    try:
+        passages = split_passages(pages)
+        vecs = embed_texts([p["text"] for p in passages]) if passages else np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        with pg.cursor() as pc:
+            pc.execute("DELETE FROM doc_passages WHERE doc_id = %s", (doc_id,))
+            for i, (p, vec) in enumerate(zip(passages, vecs)):
+                pc.execute(
+                    "INSERT INTO doc_passages(doc_id, passage_no, page, text, embedding) VALUES(%s,%s,%s,%s,%s::vector)",
+                    (doc_id, i, p["page"] if page_numbers else None, p["text"], pgvector_literal(vec)),
+                )
+            if len(passages):
+                # Keep a document-level centroid for callers that rank whole documents
+                centroid = vecs.mean(axis=0)
+                norm = float(np.linalg.norm(centroid)) or 1.0
+                pc.execute(
+                    "INSERT INTO doc_embeddings(doc_id, filename, embedding) VALUES(%s,%s,%s::vector) ON CONFLICT (doc_id) DO UPDATE SET embedding=EXCLUDED.embedding",
+                    (doc_id, filename, pgvector_literal(centroid / norm)),
+                )
+        pg.commit()
+        return len(passages)
+    finally:
+        release_pg_conn(pg)
+
+
+def embed_query(q: str) -> np.ndarray:
+    vec = query_vector_cache.get(q)
+    if vec is None:
+        vec = embed_texts([q])[0]
+        vec.setflags(write=False)
+        query_vector_cache.put(q, vec)
+    return vec
+
+
+def search_passages(q: str, limit: int = 10) -> Optional[List[Dict]]:
+    """Nearest passages to the query, or None when no vector store is available."""
+    return cached_by_generation(semantic_result_cache, (q, limit), lambda: _search_passages(q, limit))
+
+
+def _search_passages(q: str, limit: int) -> Optional[List[Dict]]:
+    if not pgvector_configured():
+        if not local_vectors_enabled():
+            return None
+        hits = local_vectors.search(embed_query(q), limit=limit)
+        filenames = _doc_filenames([h["doc_id"] for h in hits])
+        return [dict(h, filename=filenames.get(h["doc_id"], "")) for h in hits]
+    pg = get_pg_conn()
+    if pg is None:
+        return None
+    try:
+        qvec = embed_query(q)
+        with pg.cursor() as pc:
+            set_pg_search_params(pc)
+            pc.execute(
+                "SELECT doc_id, passage_no, page, text, embedding <-> %s::vector AS distance FROM doc_passages ORDER BY embedding <-> %s::vector LIMIT %s",
+                (pgvector_literal(qvec), pgvector_literal(qvec), limit),
+            )
+            rows = pc.fetchall()
+    finally:
+        release_pg_conn(pg)
+    filenames = _doc_filenames([r[0] for r in rows])
+    return [
+        {"doc_id": r[0], "filename": filenames.get(r[0], ""), "passage": r[1], "page": r[2], "text": r[3], "distance": float(r[4])}
+        for r in rows
+    ]
+
+
+def _doc_filenames(doc_ids: List[int]) -> Dict[int, str]:
+    ids = sorted(set(int(d) for d in doc_ids))
+    if not ids:
+        return {}
+    conn = get_db()
+    try:
+        rows = conn.execute(
+            f"SELECT id, filename FROM docs WHERE id IN ({','.join('?' for _ in ids)})", tuple(ids)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {r[0]: r[1] for r in rows}
+
+
+# ==================== Local Vector Index ====================
+# In-process vector store for nodes without pgvector (air-gapped installs).
+# Passage vectors are appended to a flat matrix file next to COMMUNITY_DB
+# (float32, or int8 with a per-row scale) that is memory-mapped for search;
+# passage metadata lives in the `local_passages` table keyed by matrix row.
+# Replaced rows are tombstoned and reclaimed by rebuild().
+LOCAL_VECTORS = os.environ.get("LOCAL_VECTORS", "auto").lower()
+LOCAL_VECTORS_DIR = os.environ.get("LOCAL_VECTORS_DIR", os.path.dirname(DB_PATH))
+LOCAL_VECTORS_QUANTIZE = os.environ.get("LOCAL_VECTORS_QUANTIZE", "").lower() == "int8"
+LOCAL_VECTORS_BLOCK_ROWS = 65536
+
+
+def pgvector_configured() -> bool:
+    return psycopg2 is not None and bool(os.environ.get("POSTGRES_RAG_URI"))
+
+
+def local_vectors_enabled() -> bool:
+    if LOCAL_VECTORS in ("1", "true", "yes"):
+        return True
+    return LOCAL_VECTORS == "auto" and not pgvector_configured()
+
+
+class LocalVectorIndex:
+    def __init__(self, directory: str, dim: int, quantize: bool) -> None:
+        self.directory = directory
+        self.dim = dim
+        self.dtype = np.dtype(np.int8 if quantize else np.float32)
+        self._lock = threading.RLock()
+        # (path, file size, generation) -> one immutable snapshot:
+        # (memmap, alive mask, scales, doc id per row, passage number per row)
+        self._cache_key = None
+        self._cache = None
+        self._generation = 0
+
+    def _storage(self, conn: sqlite3.Connection):
+        meta = dict(conn.execute("SELECT key, value FROM local_vector_meta").fetchall())
+        if "file" not in meta:
+            meta = {"file": f"passages.0.{self.dtype.name}", "dtype": self.dtype.name}
+            conn.executemany("INSERT OR REPLACE INTO local_vector_meta(key, value) VALUES(?,?)", list(meta.items()))
+            conn.commit()
+        return os.path.join(self.directory, meta["file"]), np.dtype(meta["dtype"])
+
+    def _encode(self, vecs: np.ndarray, dtype: np.dtype):
+        vecs = np.asarray(vecs, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+        vecs = vecs / np.where(norms > 0, norms, 1.0)
+        if dtype == np.int8:
+            scales = np.abs(vecs).max(axis=1) / 127.0
+            scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+            return np.round(vecs / scales[:, None]).astype(np.int8), scales
+        return vecs.astype(np.float32), np.ones(len(vecs), dtype=np.float32)
+
+    def _load(self):
+        conn = get_db()
+        try:
+            path, dtype = self._storage(conn)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            key = (path, size, self._generation)
+            if self._cache_key == key:
+                return self._cache
+            rows = size // (self.dim * dtype.itemsize)
+            alive = np.zeros(rows, dtype=bool)
+            scales = np.ones(rows, dtype=np.float32)
+            doc_ids = np.full(rows, -1, dtype=np.int64)
+            passage_nos = np.full(rows, -1, dtype=np.int64)
+            for row, scale, doc_id, passage_no in conn.execute(
+                "SELECT row, scale, doc_id, passage_no FROM local_passages WHERE deleted = 0"
+            ):
+                if row < rows:
+                    alive[row] = True
+                    scales[row] = scale
+                    doc_ids[row] = doc_id
+                    passage_nos[row] = passage_no
+        finally:
+            conn.close()
+        mm = np.memmap(path, dtype=dtype, mode="r", shape=(rows, self.dim)) if rows else None
+        self._cache_key, self._cache = key, (mm, alive, scales, doc_ids, passage_nos)
+        return self._cache
+
+    def add_doc(self, doc_id: int, passages: List[Dict], vecs: np.ndarray) -> int:
+        with self._lock:
+            conn = get_db()
+            try:
+                path, dtype = self._storage(conn)
+                conn.execute("UPDATE local_passages SET deleted = 1 WHERE doc_id = ? AND deleted = 0", (doc_id,))
+                if passages:
+                    data, scales = self._encode(vecs, dtype)
+                    row_bytes = self.dim * dtype.itemsize
+                    with open(path, "ab") as f:
+                        f.seek(0, os.SEEK_END)
+                        first_row = f.tell() // row_bytes
+                        # Drop a torn trailing row left by an interrupted append
+                        f.truncate(first_row * row_bytes)
+                        f.write(data.tobytes())
+                    # Vectors are on disk before their metadata; orphaned rows are simply never matched
+                    conn.executemany(
+                        "INSERT INTO local_passages(row, doc_id, passage_no, page, text, scale, deleted) VALUES(?,?,?,?,?,?,0)",
+                        [
+                            (first_row + i, doc_id, i, p.get("page"), p["text"], float(scales[i]))
+                            for i, p in enumerate(passages)
+                        ],
+                    )
+                conn.commit()
+            finally:
+                conn.close()
+            self._generation += 1
+            return len(passages)
+
+    def search(self, qvec: np.ndarray, limit: int = 10) -> List[Dict]:
+        # Everything below reads only this snapshot: rebuild() may renumber rows or unlink the
+        # file meanwhile (the memmap keeps the old file readable), but never changes the snapshot
+        with self._lock:
+            mm, alive, scales, doc_ids, passage_nos = self._load()
+        if mm is None or not alive.any():
+            return []
+        q = self._encode(qvec, np.dtype(np.float32))[0][0]
+        sims = np.empty(len(alive), dtype=np.float32)
+        for start in range(0, len(alive), LOCAL_VECTORS_BLOCK_ROWS):
+            block = np.asarray(mm[start:start + LOCAL_VECTORS_BLOCK_ROWS], dtype=np.float32)
+            sims[start:start + len(block)] = (block @ q) * scales[start:start + len(block)]
+        sims[~alive] = -np.inf
+        k = int(min(limit, int(alive.sum())))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        # Text by (doc, passage) as of the snapshot, not by row number, which a rebuild reassigns
+        hits = [(int(doc_ids[i]), int(passage_nos[i])) for i in top]
+        conn = get_db()
+        try:
+            meta = {
+                (r[0], r[1]): r[2:]
+                for r in conn.execute(
+                    "SELECT doc_id, passage_no, page, text FROM local_passages WHERE deleted = 0 AND ("
+                    + " OR ".join("(doc_id = ? AND passage_no = ?)" for _ in hits)
+                    + ")",
+                    tuple(v for hit in hits for v in hit),
+                )
+            }
+        finally:
+            conn.close()
+        results = []
+        for i, (doc_id, passage_no) in zip(top, hits):
+            if (doc_id, passage_no) not in meta:
+                continue
+            page, text = meta[(doc_id, passage_no)]
+            # Unit vectors: L2 distance, comparable with pgvector's `<->`
+            distance = float(np.sqrt(max(0.0, 2.0 - 2.0 * float(sims[i]))))
+            results.append({"doc_id": doc_id, "passage": passage_no, "page": page, "text": text, "distance": distance})
+        return results
+
+    def indexed_doc_ids(self) -> set:
+        conn = get_db()
+        try:
+            return {r[0] for r in conn.execute("SELECT DISTINCT doc_id FROM local_passages WHERE deleted = 0")}
+        finally:
+            conn.close()
+
+    def rebuild(self) -> Dict[str, int]:
+        """Compact the matrix file (drop tombstoned rows) into the configured dtype."""
+        with self._lock:
+            mm, alive, scales, _, _ = self._load()
+            conn = get_db()
+            try:
+                old_path, old_dtype = self._storage(conn)
+                gen = int(os.path.basename(old_path).split(".")[1]) + 1
+                new_name = f"passages.{gen}.{self.dtype.name}"
+                new_path = os.path.join(self.directory, new_name)
+                keep = np.flatnonzero(alive)
+                new_scales: List[float] = []
+                with open(new_path, "wb") as f:
+                    for start in range(0, len(keep), LOCAL_VECTORS_BLOCK_ROWS):
+                        idx = keep[start:start + LOCAL_VECTORS_BLOCK_ROWS]
+                        vecs = np.asarray(mm[idx], dtype=np.float32) * scales[idx][:, None]
+                        data, sc = self._encode(vecs, self.dtype)
+                        f.write(data.tobytes())
+                        new_scales.extend(float(x) for x in sc)
+                # Renumber in ascending order: new row i <= old row, so no key collisions
+                conn.execute("DELETE FROM local_passages WHERE deleted = 1")
+                conn.execute("DELETE FROM local_passages WHERE row >= ?", (len(alive),))
+                conn.executemany(
+                    "UPDATE local_passages SET row = ?, scale = ? WHERE row = ?",
+                    [(i, new_scales[i], int(old)) for i, old in enumerate(keep)],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO local_vector_meta(key, value) VALUES(?,?)",
+                    [("file", new_name), ("dtype", self.dtype.name)],
+                )
+                conn.commit()
+            finally:
+                conn.close()
+            self._cache_key = self._cache = None
+            self._generation += 1
+            try:
+                if old_path != new_path:
+                    os.unlink(old_path)
+            except Exception:
+                pass
+            return {"rows": int(len(keep)), "dropped": int(len(alive) - len(keep))}
+
+
+local_vectors = LocalVectorIndex(LOCAL_VECTORS_DIR, EMBEDDING_DIM, LOCAL_VECTORS_QUANTIZE)
+
+
+# ==================== OCR Cache ====================
+# Page-level OCR results keyed by a hash of the rendered pixels + DPI + TESS_LANGS.
+# The cache and the per-page OCR live in ocr_worker.py so the OCR pool's workers can
+# import them without importing this module.
+from ocr_worker import cached_image_to_string, cached_image_to_words, ocr_page, ocr_page_worker  # noqa: E402
+
+
 def ocr_image(data: bytes) -> str:
     image = Image.open(io.BytesIO(data)).convert("RGB")
     # Use multiple languages to improve coverage
-    text = pytesseract.image_to_string(image, lang=os.environ.get("TESS_LANGS", "eng"))
-    return text.strip()
+    return cached_image_to_string(image, os.environ.get("TESS_LANGS", "eng"))
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# Uploads are copied to disk in fixed-size chunks and hashed on the way, so no
+# request ever holds a whole file in memory.
+UPLOAD_MAX_BYTES = int(float(os.environ.get("UPLOAD_MAX_MB", "1024")) * 1024 * 1024)
+UPLOAD_CHUNK_BYTES = int(os.environ.get("UPLOAD_CHUNK_KB", "1024")) * 1024
+# Whole request body, all files of a batch included
+UPLOAD_MAX_REQUEST_BYTES = int(float(os.environ.get("UPLOAD_MAX_REQUEST_MB", str(UPLOAD_MAX_BYTES / (1024 * 1024)))) * 1024 * 1024)
+
+
+class RequestSizeLimitMiddleware:
+    """Enforces UPLOAD_MAX_REQUEST_BYTES while the body is received, before Starlette's multipart
+    parser spools anything: a too-large Content-Length fails on the first read, a chunked body as
+    soon as it crosses the limit. The 413 is raised from receive() so the route's error handling
+    (and CORS) answers it like any other HTTPException."""
+
+    def __init__(self, app, max_bytes: int) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            return await self.app(scope, receive, send)
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            if declared.isdigit() and int(declared) > self.max_bytes:
+                raise HTTPException(status_code=413, detail=f"Request exceeds {self.max_bytes // (1024 * 1024)} MB limit")
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Request exceeds {self.max_bytes // (1024 * 1024)} MB limit")
+            return message
+
+        return await self.app(scope, limited_receive, send)
+
+
+app.add_middleware(RequestSizeLimitMiddleware, max_bytes=UPLOAD_MAX_REQUEST_BYTES)
+
+
+def spool_chunks(chunks, dest_path: str, max_bytes: int = UPLOAD_MAX_BYTES) -> str:
+    """Write an iterable of byte chunks to `dest_path`; returns its sha256. Raises 413 past `max_bytes`."""
+    h = hashlib.sha256()
+    size = 0
+    part = dest_path + ".part"
+    try:
+        with open(part, "wb") as out:
+            for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"File exceeds {max_bytes // (1024 * 1024)} MB limit")
+                h.update(chunk)
+                out.write(chunk)
+        os.replace(part, dest_path)
+    except BaseException:
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+        raise
+    return h.hexdigest()
+
+
+def spool_stream(src, dest_path: str, max_bytes: int = UPLOAD_MAX_BYTES) -> str:
+    """Copy a file-like object to `dest_path` chunk by chunk; returns its sha256. Raises 413 past `max_bytes`."""
+    return spool_chunks(iter(lambda: src.read(UPLOAD_CHUNK_BYTES), b""), dest_path, max_bytes)
+
+
+async def spool_upload(f: UploadFile, dest_path: str) -> str:
+    if f.size is not None and f.size > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds {UPLOAD_MAX_BYTES // (1024 * 1024)} MB limit")
+    await f.seek(0)
+    return await cpu_executor.run(spool_stream, f.file, dest_path)
 
 
 def sanitize_filename(name: str) -> str:
@@ -258,47 +1487,384 @@ def strip_metadata_image(input_bytes: bytes) -> bytes:
 
 
 def strip_metadata_pdf(input_path: str, output_path: str) -> None:
-    reader = PdfReader(input_path)
-    writer = PdfWriter()
-    for page in reader.pages:
-        writer.add_page(page)
-    writer.remove_metadata()
-    with open(output_path, "wb") as f:
-        writer.write(f)
+    # PyMuPDF reads objects from the file on demand instead of loading it whole
+    doc = fitz.open(input_path)
+    try:
+        doc.set_metadata({})
+        doc.del_xml_metadata()
+        # The trailer /ID is random per writer (LibreOffice, other tools, PyMuPDF itself): drop it and
+        # don't let save() mint a new one, so the same content always gives the same bytes (pdf_sha256)
+        doc.xref_set_key(-1, "ID", "null")
+        doc.save(output_path, garbage=1, deflate=True, no_new_id=True)
+    finally:
+        doc.close()
 
 
-def ocr_pdf(input_pdf_path: str) -> str:
+# Page-parallel OCR: pages are rendered and recognized inside a bounded process
+# pool. Each worker opens the PDF itself so only the page index crosses the
+# process boundary, and at most OCR_MAX_INFLIGHT pages are queued at once.
+OCR_DPI = int(os.environ.get("OCR_DPI", "200"))
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", "0")) or (os.cpu_count() or 1)
+OCR_MAX_INFLIGHT = int(os.environ.get("OCR_MAX_INFLIGHT", "0")) or OCR_WORKERS * 2
+
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+_ocr_pool_lock = threading.Lock()
+
+
+def get_ocr_pool() -> Optional[ProcessPoolExecutor]:
+    global _ocr_pool
+    if OCR_WORKERS <= 1:
+        return None
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            # Never fork: this process runs threads (executors, job workers, outbox senders) and a
+            # forked child can inherit a lock held mid-operation. Workers import only ocr_worker.py.
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            ctx = multiprocessing.get_context(method)
+            _ocr_pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=ctx)
+        return _ocr_pool
+
+
+def _reset_ocr_pool() -> None:
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is not None:
+            try:
+                _ocr_pool.shutdown(wait=False, cancel_futures=True)
+            except Exception:
+                pass
+        _ocr_pool = None
+
+
+@app.on_event("shutdown")
+async def _shutdown_ocr_pool():
+    _reset_ocr_pool()
+
+
+def ocr_pdf_pages(input_pdf_path: str, page_indexes: List[int], dpi: int = OCR_DPI) -> Dict[int, Tuple[str, List[list]]]:
+    """OCR the given 0-based pages of a PDF. Returns {page_index: (text, word boxes in PDF points)}.
+    A page that cannot be rendered or OCR'd raises; only a crashed pool falls back to sequential OCR."""
+    tess_langs = os.environ.get("TESS_LANGS", "eng")
+    results: Dict[int, Tuple[str, List[list]]] = {}
+    pool = get_ocr_pool() if len(page_indexes) > 1 else None
+    if pool is not None:
+        pending: Dict = {}
+        try:
+            for idx in page_indexes:
+                if len(pending) >= OCR_MAX_INFLIGHT:
+                    done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        results[pending.pop(fut)] = fut.result()
+                pending[pool.submit(ocr_page_worker, input_pdf_path, idx, dpi, tess_langs)] = idx
+            for fut in as_completed(list(pending)):
+                results[pending[fut]] = fut.result()
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); rebuild the pool next time and finish sequentially
+            _reset_ocr_pool()
+        except BaseException:
+            # Tesseract/PyMuPDF failed on a page: don't leave the rest of the document queued
+            for fut in pending:
+                fut.cancel()
+            raise
+    missing = [i for i in page_indexes if i not in results]
+    if missing:
+        doc = fitz.open(input_pdf_path)
+        try:
+            for idx in missing:
+                results[idx] = ocr_page(doc, idx, dpi, tess_langs)
+        finally:
+            try:
+                doc.close()
+            except Exception:
+                pass
+    return results
+
+
+def ocr_pdf(input_pdf_path: str) -> str:
     try:
         doc = fitz.open(input_pdf_path)
+        page_count = len(doc)
+        doc.close()
     except Exception:
         return ""
-    texts: List[str] = []
-    tess_langs = os.environ.get("TESS_LANGS", "eng")
+    # Render pages at 200 DPI (OCR_DPI) for better OCR accuracy; output keeps page order
+    by_page = ocr_pdf_pages(input_pdf_path, list(range(page_count)))
+    texts = [by_page[i][0] for i in range(page_count) if by_page.get(i, ("",))[0]]
+    return "\n\n".join(texts).strip()
+
+
+# Hybrid extraction: born-digital pages (and LibreOffice output) already carry a
+# text layer, so only pages that look scanned are rasterized and OCR'd.
+PDF_TEXT_MIN_CHARS = int(os.environ.get("PDF_TEXT_MIN_CHARS", "25"))
+OCR_ALWAYS = os.environ.get("OCR_ALWAYS", "0").lower() in ("1", "true", "yes")
+
+
+def native_page_text(page) -> Optional[str]:
+    """Return the page's embedded text if it is usable, else None (needs OCR)."""
     try:
-        for page in doc:
-            # Render page at 200 DPI for better OCR accuracy
-            pix = page.get_pixmap(dpi=200)
-            mode = "RGBA" if pix.alpha else "RGB"
-            img = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
-            if mode == "RGBA":
-                img = img.convert("RGB")
-            t = pytesseract.image_to_string(img, lang=tess_langs)
-            if t and t.strip():
-                texts.append(t.strip())
+        text = (page.get_text("text") or "").strip()
+    except Exception:
+        return None
+    if len(text) < PDF_TEXT_MIN_CHARS:
+        return None
+    # Broken font encodings extract as replacement characters or symbol soup
+    if text.count("\ufffd") > len(text) * 0.05:
+        return None
+    meaningful = sum(1 for c in text if c.isalnum() or c.isspace())
+    if meaningful < len(text) * 0.6:
+        return None
+    return text
+
+
+def native_page_words(page) -> List[list]:
+    """The page's text-layer words as [[x0, y0, x1, y1, word, line], ...] in reading order."""
+    words: List[list] = []
+    lines: Dict[tuple, int] = {}
+    for x0, y0, x1, y1, word, block, line, _ in page.get_text("words", sort=True):
+        line_no = lines.setdefault((block, line), len(lines))
+        words.append([round(x0, 1), round(y0, 1), round(x1, 1), round(y1, 1), word, line_no])
+    return words
+
+
+def extract_pdf_page_layers(input_pdf_path: str, page_indexes: Optional[List[int]] = None, force_ocr: bool = False) -> List[Tuple[str, List[list]]]:
+    """Per-page (text, word boxes) of a PDF (all pages, or the given 0-based ones in that order):
+    native text layer where usable, OCR for the rest."""
+    doc = fitz.open(input_pdf_path)
+    try:
+        indexes = list(range(len(doc))) if page_indexes is None else list(page_indexes)
+        layers: List[Optional[Tuple[str, List[list]]]] = []
+        for i in indexes:
+            text = None if OCR_ALWAYS or force_ocr else native_page_text(doc[i])
+            layers.append(None if text is None else (text, native_page_words(doc[i])))
     finally:
         try:
             doc.close()
         except Exception:
             pass
-    return "\n\n".join(texts).strip()
+    scanned = [indexes[n] for n, layer in enumerate(layers) if layer is None]
+    if scanned:
+        ocr_layers = ocr_pdf_pages(input_pdf_path, scanned)
+        for n, i in enumerate(indexes):
+            if layers[n] is None:
+                layers[n] = ocr_layers.get(i, ("", []))
+    return [(layer[0] or "", layer[1]) for layer in layers]
+
+
+def extract_pdf_pages(input_pdf_path: str, page_indexes: Optional[List[int]] = None, force_ocr: bool = False) -> List[str]:
+    return [text for text, _ in extract_pdf_page_layers(input_pdf_path, page_indexes, force_ocr)]
+
+
+def extract_pdf_text(input_pdf_path: str) -> str:
+    return "\n\n".join(t for t in extract_pdf_pages(input_pdf_path) if t).strip()
+
+
+# ==================== LibreOffice Conversion ====================
+# Office documents are converted by long-lived headless LibreOffice processes
+# (see lo_converter.py), each with a private profile so they run in parallel.
+LO_POOL_SIZE = int(os.environ.get("LO_POOL_SIZE", "2"))
+LO_MAX_JOBS = int(os.environ.get("LO_MAX_JOBS", "200"))
+LO_JOB_TIMEOUT = float(os.environ.get("LO_JOB_TIMEOUT", "180"))
+LO_START_TIMEOUT = float(os.environ.get("LO_START_TIMEOUT", "60"))
+LO_HEALTHCHECK_IDLE_SECONDS = float(os.environ.get("LO_HEALTHCHECK_IDLE_SECONDS", "60"))
+LO_PYTHON = os.environ.get("LO_PYTHON", "/usr/bin/python3")
+LO_SOFFICE = os.environ.get("LO_SOFFICE", "soffice")
+LO_RESTART_COOLDOWN = float(os.environ.get("LO_RESTART_COOLDOWN", "60"))
+LO_POOL_DIR = os.path.join(DATA_DIR, "libreoffice")
+LO_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lo_converter.py")
+
+
+class ConverterUnavailable(RuntimeError):
+    pass
+
+
+class ConverterMissing(ConverterUnavailable):
+    """The converter can never start here (no `uno` module, no soffice binary)."""
 
 
-def ensure_pdf_canonical(input_path: str, original_filename: str, dest_dir: str) -> str:
-    """Convert any supported file (images, office, existing pdf) to a sanitized PDF.
-    Returns path to canonical PDF in dest_dir. Removes metadata for PDFs.
+# lo_converter.py's exit status when `uno` or soffice is missing
+LO_EXIT_UNAVAILABLE = 3
+
+
+class LibreOfficePool:
+    """Fixed set of converter slots; a slot's process is started lazily and recycled after LO_MAX_JOBS."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.broken = False
+        # After a failed start (e.g. soffice hung), one-shot runs take over for LO_RESTART_COOLDOWN
+        self.cooldown_until = 0.0
+        self._slots: "queue.Queue[Dict]" = queue.Queue()
+        self._all: List[Dict] = []
+        for i in range(size):
+            slot = {"slot": i, "proc": None, "socket": os.path.join(LO_POOL_DIR, f"worker-{i}.sock"), "jobs": 0, "last_used": 0.0}
+            self._all.append(slot)
+            self._slots.put(slot)
+
+    def available(self) -> bool:
+        return (
+            self.size > 0 and not self.broken and time.monotonic() >= self.cooldown_until
+            and os.path.exists(LO_WORKER_SCRIPT)
+        )
+
+    def _request(self, slot: Dict, payload: Dict, timeout: float) -> Dict:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            s.connect(slot["socket"])
+            s.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+            line = s.makefile("rb").readline()
+        if not line:
+            raise ConnectionError("converter closed the connection")
+        return json.loads(line)
+
+    def _signal_group(self, proc: subprocess.Popen, sig: int) -> None:
+        try:
+            os.killpg(proc.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def _stop(self, slot: Dict) -> None:
+        proc, slot["proc"], slot["jobs"] = slot["proc"], None, 0
+        if proc is not None:
+            # The converter leads its own process group, soffice included: a converter stuck in a
+            # UNO call never runs its SIGTERM handler, so its soffice must be killed with it
+            self._signal_group(proc, signal.SIGTERM)
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                pass
+            self._signal_group(proc, signal.SIGKILL)
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                pass
+        if slot.get("profile"):
+            shutil.rmtree(slot.pop("profile"), ignore_errors=True)
+
+    def _start(self, slot: Dict) -> None:
+        os.makedirs(LO_POOL_DIR, exist_ok=True)
+        # A fresh profile every start: soffice hands a second instance on the same profile over
+        # to whatever process still owns it, so reusing one can attach to a dead or hung office
+        for name in os.listdir(LO_POOL_DIR):
+            if name.startswith(f"profile-{slot['slot']}-"):
+                shutil.rmtree(os.path.join(LO_POOL_DIR, name), ignore_errors=True)
+        slot["profile"] = os.path.join(LO_POOL_DIR, f"profile-{slot['slot']}-{uuid.uuid4().hex[:8]}")
+        try:
+            slot["proc"] = subprocess.Popen(
+                [
+                    LO_PYTHON, LO_WORKER_SCRIPT,
+                    "--profile", slot["profile"],
+                    "--socket", slot["socket"], "--soffice", LO_SOFFICE, "--start-timeout", str(LO_START_TIMEOUT),
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        except OSError as e:
+            raise ConverterMissing(str(e))
+        deadline = time.monotonic() + LO_START_TIMEOUT + 5
+        while time.monotonic() < deadline:
+            if slot["proc"].poll() is not None:
+                if slot["proc"].returncode == LO_EXIT_UNAVAILABLE:
+                    self._stop(slot)
+                    raise ConverterMissing("LibreOffice converter cannot run here (uno or soffice missing)")
+                break
+            try:
+                if self._request(slot, {"op": "ping"}, 5).get("ok"):
+                    slot["last_used"] = time.monotonic()
+                    return
+            except (OSError, ValueError):
+                time.sleep(0.25)
+        self._stop(slot)
+        raise ConverterUnavailable("LibreOffice converter did not start")
+
+    def _healthy(self, slot: Dict) -> bool:
+        if slot["proc"] is None or slot["proc"].poll() is not None:
+            return False
+        if time.monotonic() - slot["last_used"] < LO_HEALTHCHECK_IDLE_SECONDS:
+            return True
+        try:
+            return bool(self._request(slot, {"op": "ping"}, 10).get("ok"))
+        except (OSError, ValueError):
+            return False
+
+    def convert(self, src: str, dst: str) -> None:
+        slot = self._slots.get()
+        try:
+            if not self._healthy(slot):
+                self._stop(slot)
+                try:
+                    self._start(slot)
+                except ConverterMissing:
+                    # e.g. LO_PYTHON cannot import uno: stop trying and use one-shot soffice runs
+                    self.broken = True
+                    raise
+                except ConverterUnavailable:
+                    # Start timed out or soffice crashed: may be transient, try the pool again later
+                    self.cooldown_until = time.monotonic() + LO_RESTART_COOLDOWN
+                    raise
+            try:
+                resp = self._request(slot, {"op": "convert", "src": src, "dst": dst}, LO_JOB_TIMEOUT)
+            except (OSError, ValueError):
+                # Timed out or crashed mid-job: the process state is unknown, replace it
+                self._stop(slot)
+                raise
+            slot["jobs"] += 1
+            slot["last_used"] = time.monotonic()
+            if not resp.get("ok"):
+                raise RuntimeError(resp.get("error") or "conversion failed")
+        finally:
+            if slot["proc"] is not None and slot["jobs"] >= LO_MAX_JOBS:
+                self._stop(slot)
+            self._slots.put(slot)
+
+    def shutdown(self) -> None:
+        for slot in self._all:
+            self._stop(slot)
+
+
+libreoffice_pool = LibreOfficePool(LO_POOL_SIZE)
+
+
+@app.on_event("shutdown")
+async def _shutdown_libreoffice_pool():
+    libreoffice_pool.shutdown()
+
+
+def convert_with_soffice(src: str, out_dir: str) -> Optional[str]:
+    """One-shot `soffice --convert-to pdf` with a throwaway profile. Returns the PDF path, or None if
+    LibreOffice couldn't convert the file; raises ConverterUnavailable if soffice is missing, hangs or crashes."""
+    cmd = [
+        LO_SOFFICE,
+        "--headless",
+        "--nolockcheck",
+        "--norestore",
+        "--nodefault",
+        "--invisible",
+        f"-env:UserInstallation=file://{os.path.join(out_dir, 'profile')}",
+        "--convert-to",
+        "pdf",
+        "--outdir",
+        out_dir,
+        src,
+    ]
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=LO_JOB_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise ConverterUnavailable(f"soffice: {e}")
+    # soffice exits 0 when it merely can't read the file; anything else is a crash
+    if proc.returncode != 0:
+        raise ConverterUnavailable(f"soffice exited with status {proc.returncode}")
+    # Find resulting PDF (LibreOffice names it with .pdf extension)
+    for fn in os.listdir(out_dir):
+        if fn.lower().endswith(".pdf"):
+            return os.path.join(out_dir, fn)
+    return None
+
+
+def ensure_pdf_canonical(input_path: str, original_filename: str, out_pdf_path: str) -> str:
+    """Convert any supported file (images, office, existing pdf) to a sanitized PDF at out_pdf_path.
+    Every path ends in strip_metadata_pdf, so the output carries no dates or IDs and is byte-stable.
     """
-    name_no_ext = os.path.splitext(sanitize_filename(os.path.basename(original_filename)))[0]
-    out_pdf_path = os.path.join(dest_dir, f"{name_no_ext}.pdf")
     lowered = original_filename.lower()
     # If it's already a PDF, re-write to strip metadata
     if lowered.endswith(".pdf"):
@@ -308,45 +1874,68 @@ def ensure_pdf_canonical(input_path: str, original_filename: str, dest_dir: str)
         return out_pdf_path
     # If it's an image, write a fresh PDF
     if lowered.endswith((".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp")):
+        tmp_out = out_pdf_path + ".img.pdf"
         with Image.open(input_path).convert("RGB") as img:
-            img.save(out_pdf_path, format="PDF")
+            img.save(tmp_out, format="PDF")
+        try:
+            # Pillow stamps the creation time into the PDF
+            strip_metadata_pdf(tmp_out, out_pdf_path)
+        finally:
+            os.remove(tmp_out)
         return out_pdf_path
     # Otherwise, attempt LibreOffice headless conversion
-    try:
-        with tempfile.TemporaryDirectory() as tdir:
-            # Copy input file into temp to avoid LO issues with spaces/perm
-            base = os.path.basename(input_path)
-            temp_src = os.path.join(tdir, base)
-            with open(input_path, "rb") as src, open(temp_src, "wb") as dst:
-                dst.write(src.read())
-            cmd = [
-                "soffice",
-                "--headless",
-                "--nolockcheck",
-                "--norestore",
-                "--nodefault",
-                "--invisible",
-                "--convert-to",
-                "pdf",
-                "--outdir",
-                tdir,
-                temp_src,
-            ]
-            proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=180)
-            if proc.returncode == 0:
-                # Find resulting PDF (LibreOffice names it with .pdf extension)
-                for fn in os.listdir(tdir):
-                    if fn.lower().endswith(".pdf"):
-                        src_pdf = os.path.join(tdir, fn)
-                        strip_metadata_pdf(src_pdf, out_pdf_path)
-                        return out_pdf_path
-    except Exception:
-        pass
+    with tempfile.TemporaryDirectory() as tdir:
+        # Link (or stream-copy) the input into temp to avoid LO issues with spaces/perm
+        base = os.path.basename(input_path)
+        temp_src = os.path.join(tdir, base)
+        try:
+            os.link(input_path, temp_src)
+        except OSError:
+            shutil.copyfile(input_path, temp_src)
+        try:
+            if libreoffice_pool.available():
+                try:
+                    src_pdf = os.path.join(tdir, "converted.pdf")
+                    libreoffice_pool.convert(temp_src, src_pdf)
+                except (ConverterUnavailable, OSError, ValueError):
+                    # Not started, timed out or crashed mid-job: retry once with a one-shot run
+                    src_pdf = convert_with_soffice(temp_src, tdir)
+            else:
+                src_pdf = convert_with_soffice(temp_src, tdir)
+        except ConverterUnavailable as e:
+            # Our converter failed, not the upload: a server error, so ingestion retries the job
+            raise HTTPException(status_code=503, detail=f"Document converter failed: {e}")
+        except RuntimeError:
+            # LibreOffice ran but couldn't load or export the file
+            src_pdf = None
+        if src_pdf:
+            try:
+                strip_metadata_pdf(src_pdf, out_pdf_path)
+                return out_pdf_path
+            except Exception:
+                pass
     # As a last resort, fail with unsupported
     raise HTTPException(status_code=415, detail="Unsupported file type for conversion to PDF")
 
 
 # ==================== OpenKM Integration ====================
+# Uploads never happen on the request path: callers queue files in the `openkm_outbox`
+# table and background senders deliver them over one pooled keep-alive session,
+# retrying with exponential backoff while OpenKM is unreachable.
+OPENKM_OUTBOX_DIR = os.path.join(DATA_DIR, "outbox")
+OPENKM_OUTBOX_WORKERS = max(1, int(os.environ.get("OPENKM_OUTBOX_WORKERS", "2")))
+OPENKM_OUTBOX_MAX_ATTEMPTS = max(1, int(os.environ.get("OPENKM_OUTBOX_MAX_ATTEMPTS", "12")))
+OPENKM_OUTBOX_BACKOFF_BASE = float(os.environ.get("OPENKM_OUTBOX_BACKOFF_BASE", "5"))
+OPENKM_OUTBOX_BACKOFF_MAX = float(os.environ.get("OPENKM_OUTBOX_BACKOFF_MAX", "3600"))
+OPENKM_OUTBOX_POLL_SECONDS = float(os.environ.get("OPENKM_OUTBOX_POLL_SECONDS", "5"))
+OPENKM_OUTBOX_RETENTION_DAYS = float(os.environ.get("OPENKM_OUTBOX_RETENTION_DAYS", "30"))
+OPENKM_UPLOAD_TIMEOUT = float(os.environ.get("OPENKM_UPLOAD_TIMEOUT", "60"))
+
+
+class OpenKMError(Exception):
+    pass
+
+
 class OpenKMClient:
     def __init__(self) -> None:
         self.base_url: str = os.environ.get("OPENKM_BASE_URL", "").rstrip("/")
@@ -354,6 +1943,8 @@ class OpenKMClient:
         self.password: Optional[str] = os.environ.get("OPENKM_PASSWORD")
         # Default destination folder in OpenKM repository
         self.upload_root: str = os.environ.get("OPENKM_UPLOAD_ROOT", "/okm:root/Community")
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
 
     def is_configured(self) -> bool:
         return bool(self.base_url and self.username and self.password)
@@ -361,57 +1952,619 @@ class OpenKMClient:
     def _auth(self):
         return (self.username or "", self.password or "")
 
+    def session(self) -> requests.Session:
+        # One keep-alive pool shared by the outbox senders
+        with self._session_lock:
+            if self._session is None:
+                s = requests.Session()
+                s.auth = self._auth()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=OPENKM_OUTBOX_WORKERS)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                self._session = s
+            return self._session
+
+    def close(self) -> None:
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
     def _doc_exists(self, path: str) -> bool:
         try:
-            # HEAD can be used to check existence; fallback to GET metadata
-            r = requests.get(
+            r = self.session().get(
                 f"{self.base_url}/services/rest/document/getProperties",
                 params={"docPath": path},
-                auth=self._auth(),
                 timeout=10,
             )
             return r.status_code == 200
         except Exception:
             return False
 
-    def upload_file(self, local_path: str, dst_dir: Optional[str] = None) -> Optional[str]:
-        if not os.path.isfile(local_path):
-            return None
+    def upload_file(self, local_path: str, dst_dir: Optional[str] = None, filename: Optional[str] = None) -> str:
+        """Create the document, or check in a new version if it already exists. Returns its
+        OpenKM path; raises OpenKMError (or a requests exception) on failure."""
         if not self.is_configured():
-            return None
+            raise OpenKMError("OpenKM is not configured")
         directory = dst_dir or f"{self.upload_root}/uploads"
-        filename = os.path.basename(local_path)
+        filename = filename or os.path.basename(local_path)
         dst_path = f"{directory}/{filename}"
-        # If the document already exists, we can attempt a simple check-in (new version)
+        s = self.session()
+        # Create first: queued files are nearly always new, so the existence check only runs on a conflict
+        with open(local_path, "rb") as f:
+            r = s.post(
+                f"{self.base_url}/services/rest/document/createSimple",
+                data={"path": dst_path},
+                files={"content": (filename, f)},
+                timeout=OPENKM_UPLOAD_TIMEOUT,
+            )
+        if r.status_code in (200, 201):
+            return dst_path
+        # OpenKM reports an existing path as a 500 ItemExistsException; other errors are failures
+        if not (r.status_code == 409 or "ItemExists" in r.text or (r.status_code == 500 and self._doc_exists(dst_path))):
+            raise OpenKMError(f"createSimple: HTTP {r.status_code} {r.text[:200]}")
+        with open(local_path, "rb") as f:
+            r = s.post(
+                f"{self.base_url}/services/rest/document/checkin",
+                params={"docPath": dst_path, "comment": "update from community API"},
+                files={"content": (filename, f)},
+                timeout=OPENKM_UPLOAD_TIMEOUT,
+            )
+        if r.status_code in (200, 204):
+            return dst_path
+        raise OpenKMError(f"checkin: HTTP {r.status_code} {r.text[:200]}")
+
+
+openkm_client = OpenKMClient()
+
+_outbox_wakeup = threading.Event()
+_outbox_stop = threading.Event()
+_outbox_threads: List[threading.Thread] = []
+# Shared by the senders: while OpenKM keeps failing they all pause, instead of
+# burning one failed attempt on every queued item
+_outbox_state = {"failures": 0, "pause_until": 0.0, "pruned_at": 0.0}
+_outbox_lock = threading.Lock()
+
+
+def outbox_backoff(attempts: int) -> float:
+    """Seconds to wait after failure number `attempts` (1-based): exponential, capped, jittered."""
+    delay = min(OPENKM_OUTBOX_BACKOFF_MAX, OPENKM_OUTBOX_BACKOFF_BASE * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def enqueue_openkm_upload(local_path: str, dst_dir: Optional[str] = None) -> Optional[int]:
+    """Queue a file for upload to OpenKM; a no-op when OpenKM isn't configured. The file is
+    hard-linked (or copied) into the outbox, so cache eviction or cleanup can't lose it."""
+    if not openkm_client.is_configured() or not os.path.isfile(local_path):
+        return None
+    os.makedirs(OPENKM_OUTBOX_DIR, exist_ok=True)
+    filename = os.path.basename(local_path)
+    spooled = os.path.join(OPENKM_OUTBOX_DIR, f"{uuid.uuid4().hex}_{filename}")
+    try:
+        os.link(local_path, spooled)
+    except OSError:
+        shutil.copyfile(local_path, spooled)
+    now = datetime.utcnow().isoformat()
+    conn = get_db()
+    try:
+        cur = conn.execute(
+            "INSERT INTO openkm_outbox(local_path, filename, dst_dir, next_attempt_at, created_at, updated_at) VALUES(?,?,?,?,?,?)",
+            (spooled, filename, dst_dir or f"{openkm_client.upload_root}/uploads", time.time(), now, now),
+        )
+        conn.commit()
+        outbox_id = cur.lastrowid
+    finally:
+        conn.close()
+    _outbox_wakeup.set()
+    return outbox_id
+
+
+def _claim_outbox_item() -> Optional[tuple]:
+    conn = get_db()
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT id, local_path, filename, dst_dir, attempts FROM openkm_outbox"
+            " WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at, id LIMIT 1",
+            (time.time(),),
+        ).fetchone()
+        if not row:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE openkm_outbox SET status = 'sending', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+            (datetime.utcnow().isoformat(), row[0]),
+        )
+        conn.execute("COMMIT")
+        return (*row[:4], row[4] + 1)
+    except Exception:
         try:
-            if self._doc_exists(dst_path):
-                with open(local_path, "rb") as f:
-                    r = requests.post(
-                        f"{self.base_url}/services/rest/document/checkin",
-                        params={"docPath": dst_path, "comment": "update from community API"},
-                        files={"content": (filename, f)},
-                        auth=self._auth(),
-                        timeout=60,
-                    )
-                    if r.status_code in (200, 204):
-                        return dst_path
-            # Create new document
-            with open(local_path, "rb") as f:
-                r = requests.post(
-                    f"{self.base_url}/services/rest/document/createSimple",
-                    data={"path": dst_path},
-                    files={"content": (filename, f)},
-                    auth=self._auth(),
-                    timeout=60,
-                )
-                if r.status_code in (200, 201):
-                    return dst_path
+            conn.execute("ROLLBACK")
         except Exception:
+            pass
+        return None
+    finally:
+        conn.close()
+
+
+def _set_outbox(item_id: int, **fields) -> None:
+    fields["updated_at"] = datetime.utcnow().isoformat()
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    conn = get_db()
+    try:
+        conn.execute(f"UPDATE openkm_outbox SET {cols} WHERE id = ?", (*fields.values(), item_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def send_outbox_item(item: tuple) -> bool:
+    item_id, local_path, filename, dst_dir, attempts = item
+    if not os.path.isfile(local_path):
+        _set_outbox(item_id, status="failed", last_error="Spooled file is missing")
+        return False
+    try:
+        okm_path = openkm_client.upload_file(local_path, dst_dir=dst_dir, filename=filename)
+    except Exception as e:
+        with _outbox_lock:
+            _outbox_state["failures"] += 1
+            _outbox_state["pause_until"] = time.time() + outbox_backoff(_outbox_state["failures"])
+        _set_outbox(
+            item_id,
+            status="failed" if attempts >= OPENKM_OUTBOX_MAX_ATTEMPTS else "pending",
+            next_attempt_at=time.time() + outbox_backoff(attempts),
+            last_error=f"{type(e).__name__}: {e}"[:500],
+        )
+        return False
+    with _outbox_lock:
+        _outbox_state["failures"] = 0
+        _outbox_state["pause_until"] = 0.0
+    _set_outbox(item_id, status="sent", okm_path=okm_path, last_error=None)
+    try:
+        os.remove(local_path)
+    except OSError:
+        pass
+    return True
+
+
+def _prune_outbox() -> None:
+    # Delivered rows only matter to the status view
+    if time.time() - _outbox_state["pruned_at"] < 3600:
+        return
+    _outbox_state["pruned_at"] = time.time()
+    cutoff = (datetime.utcnow() - timedelta(days=OPENKM_OUTBOX_RETENTION_DAYS)).isoformat()
+    conn = get_db()
+    try:
+        conn.execute("DELETE FROM openkm_outbox WHERE status = 'sent' AND updated_at < ?", (cutoff,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _outbox_worker() -> None:
+    while not _outbox_stop.is_set():
+        pause = _outbox_state["pause_until"] - time.time()
+        if pause > 0:
+            _outbox_stop.wait(timeout=min(pause, OPENKM_OUTBOX_POLL_SECONDS))
+            continue
+        item = _claim_outbox_item()
+        if item is None:
+            try:
+                _prune_outbox()
+            except Exception:
+                pass
+            _outbox_wakeup.wait(timeout=OPENKM_OUTBOX_POLL_SECONDS)
+            _outbox_wakeup.clear()
+            continue
+        try:
+            send_outbox_item(item)
+        except Exception as e:
+            # send_outbox_item records upload failures itself; this is one it couldn't
+            logger.exception("openkm outbox item %s failed", item[0])
+            try:
+                _set_outbox(
+                    item[0],
+                    status="failed" if item[4] >= OPENKM_OUTBOX_MAX_ATTEMPTS else "pending",
+                    next_attempt_at=time.time() + outbox_backoff(item[4]),
+                    last_error=f"{type(e).__name__}: {e}"[:500],
+                )
+            except Exception:
+                # Still `sending`: start_outbox_senders re-queues it on the next start
+                logger.exception("could not record the failure of openkm outbox item %s", item[0])
+
+
+def start_outbox_senders() -> None:
+    if _outbox_threads or not openkm_client.is_configured():
+        return
+    # Items left 'sending' by a previous process may not have arrived; send them again
+    conn = get_db()
+    conn.execute("UPDATE openkm_outbox SET status = 'pending', updated_at = ? WHERE status = 'sending'", (datetime.utcnow().isoformat(),))
+    conn.commit()
+    conn.close()
+    _outbox_stop.clear()
+    for i in range(OPENKM_OUTBOX_WORKERS):
+        t = threading.Thread(target=_outbox_worker, name=f"openkm-outbox-{i}", daemon=True)
+        t.start()
+        _outbox_threads.append(t)
+
+
+@app.on_event("startup")
+async def _startup_outbox_senders():
+    start_outbox_senders()
+
+
+@app.on_event("shutdown")
+async def _shutdown_outbox_senders():
+    _outbox_stop.set()
+    _outbox_wakeup.set()
+    openkm_client.close()
+
+
+# ==================== Ingestion Jobs ====================
+# Uploads are persisted to INCOMING_DIR and processed by a pool of background
+# workers so the HTTP request returns immediately. Each job walks the stages
+# convert -> ocr -> translate -> embed and checkpoints its progress in the
+# `jobs` table, so a restart resumes in-flight jobs from their last stage.
+INCOMING_DIR = os.path.join(DATA_DIR, "incoming")
+INGEST_WORKERS = max(1, int(os.environ.get("INGEST_WORKERS", "2")))
+INGEST_MAX_ATTEMPTS = max(1, int(os.environ.get("INGEST_MAX_ATTEMPTS", "3")))
+INGEST_POLL_SECONDS = float(os.environ.get("INGEST_POLL_SECONDS", "5"))
+
+os.makedirs(INCOMING_DIR, exist_ok=True)
+
+_job_wakeup = threading.Event()
+_job_stop = threading.Event()
+_job_threads: List[threading.Thread] = []
+
+
+def find_known_upload(content_sha256: str) -> Optional[Dict]:
+    """Return the existing document (or in-flight job) for already-seen upload bytes."""
+    conn = get_db()
+    try:
+        row = conn.execute(
+            "SELECT id, filename, lang FROM docs WHERE content_sha256 = ? ORDER BY id LIMIT 1",
+            (content_sha256,),
+        ).fetchone()
+        if row:
+            return {"id": row[0], "filename": row[1], "lang": row[2], "status": "done"}
+        row = conn.execute(
+            "SELECT id, status FROM jobs WHERE content_sha256 = ? AND status IN ('queued','running') ORDER BY id LIMIT 1",
+            (content_sha256,),
+        ).fetchone()
+        if row:
+            return {"job_id": row[0], "status": row[1]}
+        return None
+    finally:
+        conn.close()
+
+
+def enqueue_ingest_job(raw_path: str, original_filename: str, owner_email: Optional[str], content_sha256: Optional[str] = None) -> int:
+    now = datetime.utcnow().isoformat()
+    conn = get_db()
+    try:
+        cur = conn.execute(
+            "INSERT INTO jobs(status, stage, original_filename, raw_path, owner_email, content_sha256, created_at, updated_at) VALUES('queued','convert',?,?,?,?,?,?)",
+            (original_filename, raw_path, owner_email, content_sha256, now, now),
+        )
+        conn.commit()
+        job_id = cur.lastrowid
+    finally:
+        conn.close()
+    _job_wakeup.set()
+    return job_id
+
+
+def _claim_next_job() -> Optional[int]:
+    conn = get_db()
+    conn.isolation_level = None
+    try:
+        # IMMEDIATE takes the write lock up front so two workers never claim the same row
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1").fetchone()
+        if not row:
+            conn.execute("COMMIT")
             return None
+        conn.execute(
+            "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+            (datetime.utcnow().isoformat(), row[0]),
+        )
+        conn.execute("COMMIT")
+        return row[0]
+    except Exception:
+        try:
+            conn.execute("ROLLBACK")
+        except Exception:
+            pass
         return None
+    finally:
+        conn.close()
 
 
-openkm_client = OpenKMClient()
+def _set_job(job_id: int, **fields) -> None:
+    fields["updated_at"] = datetime.utcnow().isoformat()
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    conn = get_db()
+    try:
+        conn.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _find_doc_by_pdf_hash(pdf_sha256: str):
+    conn = get_db()
+    try:
+        row = conn.execute("SELECT id, filename FROM docs WHERE pdf_sha256 = ? ORDER BY id LIMIT 1", (pdf_sha256,)).fetchone()
+        return (row[0], row[1]) if row else None
+    finally:
+        conn.close()
+
+
+def _find_doc_by_content_hash(content_sha256: str):
+    conn = get_db()
+    try:
+        row = conn.execute("SELECT id, filename FROM docs WHERE content_sha256 = ? ORDER BY id LIMIT 1", (content_sha256,)).fetchone()
+        return (row[0], row[1]) if row else None
+    finally:
+        conn.close()
+
+
+def _is_stored_doc_file(path: str) -> bool:
+    """True if path is a file in DATA_DIR that some document points to."""
+    if os.path.dirname(os.path.abspath(path)) != os.path.abspath(DATA_DIR):
+        return False
+    conn = get_db()
+    try:
+        return conn.execute("SELECT 1 FROM docs WHERE filename = ? LIMIT 1", (os.path.basename(path),)).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def _unique_stored_path(conn: sqlite3.Connection, original_filename: str) -> str:
+    """A DATA_DIR path for a new document's PDF that neither exists nor is referenced in `docs`."""
+    base = os.path.splitext(sanitize_filename(os.path.basename(original_filename)))[0] or "document"
+    n = 1
+    while True:
+        name = f"{base}.pdf" if n == 1 else f"{base}-{n}.pdf"
+        path = os.path.join(DATA_DIR, name)
+        if not os.path.exists(path) and conn.execute("SELECT 1 FROM docs WHERE filename = ? LIMIT 1", (name,)).fetchone() is None:
+            return path
+        n += 1
+
+
+def _finish_duplicate_job(job_id: int, canonical_path: Optional[str], pdf_sha256: Optional[str], existing) -> None:
+    existing_id, _ = existing
+    # Drop this job's copy of the PDF, but never a file a document points to
+    if canonical_path and os.path.exists(canonical_path) and not _is_stored_doc_file(canonical_path):
+        try:
+            os.unlink(canonical_path)
+        except Exception:
+            pass
+    _set_job(
+        job_id, stage="done", status="done", duplicate=1, doc_id=existing_id,
+        pdf_sha256=pdf_sha256, text=None, translated=None, page_texts=None, page_translations=None, page_words=None, error=None,
+    )
+
+
+def pack_words(words: list) -> bytes:
+    """Compact storage form of word-box lists ([[x0, y0, x1, y1, word, line], ...])."""
+    return zlib.compress(json.dumps(words, separators=(",", ":")).encode("utf-8"))
+
+
+def unpack_words(blob: Optional[bytes]) -> list:
+    return json.loads(zlib.decompress(blob)) if blob else []
+
+
+def store_doc_pages(
+    conn: sqlite3.Connection, doc_id: int, pages: List[Tuple[int, str, str]], words: Optional[List[List[list]]] = None,
+) -> List[int]:
+    """Upsert (page, text, translated) rows, 1-based pages, and optionally their word boxes, in the
+    caller's transaction; only pages whose text changed touch the FTS index. Returns the changed page numbers."""
+    changed = []
+    for n, (page_no, text, translated) in enumerate(pages):
+        cur = conn.execute(
+            "INSERT INTO doc_pages(doc_id, page, text, translated) VALUES(?,?,?,?)"
+            " ON CONFLICT(doc_id, page) DO UPDATE SET text = excluded.text, translated = excluded.translated"
+            " WHERE doc_pages.text IS NOT excluded.text OR doc_pages.translated IS NOT excluded.translated",
+            (doc_id, page_no, text or "", translated or ""),
+        )
+        if cur.rowcount:
+            changed.append(page_no)
+        if words is not None and n < len(words):
+            conn.execute("UPDATE doc_pages SET words = ? WHERE doc_id = ? AND page = ?", (pack_words(words[n]), doc_id, page_no))
+    return changed
+
+
+def doc_page_texts(conn: sqlite3.Connection, doc_id: int) -> Tuple[List[str], List[str]]:
+    """(texts, translations) of a document's stored pages in page order; empty if it has none."""
+    rows = conn.execute("SELECT text, translated FROM doc_pages WHERE doc_id = ? ORDER BY page", (doc_id,)).fetchall()
+    return [r[0] for r in rows], [r[1] for r in rows]
+
+
+def run_ingest_job(job_id: int) -> None:
+    conn = get_db()
+    row = conn.execute(
+        "SELECT stage, original_filename, raw_path, canonical_path, text, lang, translated, doc_id, attempts, content_sha256, pdf_sha256, page_texts, page_translations, page_words FROM jobs WHERE id = ?",
+        (job_id,),
+    ).fetchone()
+    conn.close()
+    if not row:
+        return
+    stage, original_filename, raw_path, canonical_path, text, lang, translated, doc_id, attempts, content_sha256, pdf_sha256 = row[:11]
+    pages: List[str] = json.loads(row[11]) if row[11] else []
+    translated_pages: List[str] = json.loads(row[12]) if row[12] else []
+    page_words: List[List[list]] = unpack_words(row[13])
+    try:
+        if stage == "convert":
+            # The same upload bytes may have been ingested since this job was queued
+            existing = _find_doc_by_content_hash(content_sha256) if content_sha256 else None
+            if existing is not None:
+                try:
+                    os.unlink(raw_path)
+                except Exception:
+                    pass
+                _finish_duplicate_job(job_id, None, None, existing)
+                return
+            # Convert everything to a canonical PDF and keep only that. It stays at a per-job path
+            # until its document is created, so it can never overwrite another document's file.
+            canonical_path = ensure_pdf_canonical(raw_path, original_filename, os.path.join(INCOMING_DIR, f"job_{job_id}.pdf"))
+            pdf_sha256 = sha256_file(canonical_path)
+            try:
+                os.unlink(raw_path)
+            except Exception:
+                pass
+            # Different upload bytes can still canonicalize to a PDF we already have
+            existing = _find_doc_by_pdf_hash(pdf_sha256)
+            if existing is not None:
+                _finish_duplicate_job(job_id, canonical_path, pdf_sha256, existing)
+                return
+            _set_job(job_id, stage="ocr", canonical_path=canonical_path, pdf_sha256=pdf_sha256)
+            stage = "ocr"
+        if stage == "ocr":
+            # Native text layer where present, OCR only for scanned pages. An OCR failure
+            # propagates so the job is retried or failed instead of storing empty pages.
+            layers = extract_pdf_page_layers(canonical_path)
+            pages = [t for t, _ in layers]
+            page_words = [w for _, w in layers]
+            text = "\n\n".join(t for t in pages if t).strip()
+            _set_job(job_id, stage="translate", text=text, page_texts=json.dumps(pages), page_words=pack_words(page_words))
+            stage = "translate"
+        if stage == "translate":
+            # Detect language and translate to English using offline translator if available
+            lang = None
+            translated_pages = list(pages)
+            try:
+                if text:
+                    lang = detect(text)
+                    # Page by page so passages stay attributable; the translator and its memory are shared
+                    translated_pages = [translate_to_english_offline(t, lang) for t in pages]
+            except Exception:
+                pass
+            translated = "\n\n".join(t for t in translated_pages if t).strip() or (text or "")
+            # Insert the document and advance the job in one transaction so a resume never duplicates it.
+            # IMMEDIATE also serializes the duplicate check against concurrent workers.
+            conn = get_db()
+            conn.isolation_level = None
+            moved_to = None
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                existing = None
+                if pdf_sha256:
+                    existing = conn.execute(
+                        "SELECT id, filename FROM docs WHERE pdf_sha256 = ? ORDER BY id LIMIT 1", (pdf_sha256,)
+                    ).fetchone()
+                if existing is None:
+                    # The PDF gets its stored name only now, one that no document uses yet
+                    stored_path = canonical_path
+                    if os.path.dirname(os.path.abspath(canonical_path)) != os.path.abspath(DATA_DIR):
+                        stored_path = _unique_stored_path(conn, original_filename)
+                        os.replace(canonical_path, stored_path)
+                        moved_to = stored_path
+                    cur = conn.execute(
+                        "INSERT INTO docs(filename, lang, text, translated, content_sha256, pdf_sha256, created_at) VALUES(?,?,?,?,?,?,?)",
+                        (os.path.basename(stored_path), lang or "unknown", text or "", translated, content_sha256, pdf_sha256, datetime.utcnow().isoformat()),
+                    )
+                    doc_id = cur.lastrowid
+                    store_doc_pages(conn, doc_id, list(zip(range(1, len(pages) + 1), pages, translated_pages)), page_words)
+                    conn.execute(
+                        "UPDATE jobs SET stage = 'embed', canonical_path = ?, lang = ?, translated = ?, page_translations = ?, doc_id = ?, updated_at = ? WHERE id = ?",
+                        (stored_path, lang or "unknown", translated, json.dumps(translated_pages), doc_id, datetime.utcnow().isoformat(), job_id),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                try:
+                    conn.execute("ROLLBACK")
+                except Exception:
+                    pass
+                if moved_to:
+                    os.replace(moved_to, canonical_path)
+                raise
+            finally:
+                conn.close()
+            if existing is not None:
+                _finish_duplicate_job(job_id, canonical_path, pdf_sha256, (existing[0], existing[1]))
+                return
+            canonical_path = moved_to or canonical_path
+            # Queue for OpenKM only now that this is a new document, so duplicates are never sent
+            try:
+                enqueue_openkm_upload(canonical_path)
+            except Exception:
+                pass
+            stage = "embed"
+        if stage == "embed":
+            # Try to create/update passage embeddings in pgvector
+            try:
+                if translated_pages:
+                    index_doc_passages(doc_id, original_filename, translated_pages)
+                elif translated:
+                    index_doc_passages(doc_id, original_filename, [translated], page_numbers=False)
+                touch_doc_revision(doc_id)
+            except Exception:
+                pass
+            stage = "thumbs" if PRERENDER_THUMBNAILS else "done"
+            _set_job(job_id, stage=stage)
+        if stage == "thumbs":
+            # Optional: warm the page image cache so viewers open instantly
+            try:
+                prerender_thumbnails(canonical_path)
+            except Exception:
+                pass
+        if stage in ("thumbs", "done"):
+            # Derived text now lives in `docs`; drop the checkpoint copies
+            _set_job(job_id, stage="done", status="done", text=None, translated=None, page_texts=None, page_translations=None, page_words=None, error=None)
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else f"{type(e).__name__}: {e}"
+        # Client errors (unsupported file, ...) are final; server-side failures are retried
+        retry = (not isinstance(e, HTTPException) or e.status_code >= 500) and attempts < INGEST_MAX_ATTEMPTS
+        _set_job(job_id, status="queued" if retry else "failed", error=str(detail)[:500])
+        if retry:
+            _job_wakeup.set()
+
+
+def _ingest_worker() -> None:
+    while not _job_stop.is_set():
+        job_id = _claim_next_job()
+        if job_id is None:
+            _job_wakeup.wait(timeout=INGEST_POLL_SECONDS)
+            _job_wakeup.clear()
+            continue
+        try:
+            run_ingest_job(job_id)
+        except Exception as e:
+            # run_ingest_job records its own failures; this is one it couldn't (e.g. a database error)
+            logger.exception("ingest job %s failed", job_id)
+            try:
+                _set_job(job_id, status="failed", error=f"{type(e).__name__}: {e}"[:500])
+            except Exception:
+                # Still `running`: start_ingest_workers re-queues it on the next start
+                logger.exception("could not record the failure of ingest job %s", job_id)
+
+
+def start_ingest_workers() -> None:
+    if _job_threads:
+        return
+    # Jobs left 'running' by a previous process were interrupted; resume them from their last stage
+    conn = get_db()
+    conn.execute("UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running'", (datetime.utcnow().isoformat(),))
+    conn.commit()
+    conn.close()
+    _job_stop.clear()
+    for i in range(INGEST_WORKERS):
+        t = threading.Thread(target=_ingest_worker, name=f"ingest-{i}", daemon=True)
+        t.start()
+        _job_threads.append(t)
+
+
+@app.on_event("startup")
+async def _startup_ingest_workers():
+    start_ingest_workers()
+
+
+@app.on_event("shutdown")
+async def _shutdown_ingest_workers():
+    _job_stop.set()
+    _job_wakeup.set()
 
 # ==================== Auth / Security ====================
 JWT_SECRET: str = os.environ.get("JWT_SECRET_KEY", "dev-insecure-secret-change-me")
@@ -443,7 +2596,77 @@ def create_access_token(email: str, role: str, expires_minutes: int = 60 * 24) -
     return token
 
 
-def get_current_user(request: Request, credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> Dict[str, str]:
+# OpenKM session validation results, keyed by a hash of the session cookie. Denials
+# expire sooner so a fresh login is picked up quickly.
+OPENKM_SESSION_TTL = float(os.environ.get("OPENKM_SESSION_TTL", "60"))
+OPENKM_SESSION_NEGATIVE_TTL = float(os.environ.get("OPENKM_SESSION_NEGATIVE_TTL", "10"))
+OPENKM_SESSION_CACHE_SIZE = int(os.environ.get("OPENKM_SESSION_CACHE_SIZE", "4096"))
+openkm_sessions = TTLCache(OPENKM_SESSION_CACHE_SIZE, OPENKM_SESSION_TTL)
+_openkm_http: Optional["httpx.AsyncClient"] = None
+_openkm_inflight: Dict[str, "asyncio.Future"] = {}
+
+
+def openkm_session_key(cookie_header: str) -> str:
+    # Key on the session id alone so unrelated cookies don't fragment the cache
+    m = re.search(r"(?:^|;\s*)JSESSIONID=([^;]+)", cookie_header)
+    return hashlib.sha256((m.group(1) if m else cookie_header).encode("utf-8")).hexdigest()
+
+
+async def _check_openkm_session(okm_base: str, cookie_header: str) -> Optional[bool]:
+    """True/False from OpenKM, None when OpenKM could not be reached (not cached)."""
+    global _openkm_http
+    url = f"{okm_base}/services/rest/document/getRootFolder"
+    try:
+        if httpx is not None:
+            if _openkm_http is None or _openkm_http.is_closed:
+                _openkm_http = httpx.AsyncClient(timeout=httpx.Timeout(5.0))
+            r = await _openkm_http.get(url, headers={"Cookie": cookie_header})
+        else:
+            r = await http_executor.run(requests.get, url, headers={"Cookie": cookie_header}, timeout=5)
+    except Exception:
+        return None
+    return r.status_code == 200
+
+
+async def openkm_session_is_valid(okm_base: str, cookie_header: str) -> bool:
+    key = openkm_session_key(cookie_header)
+    while True:
+        cached = openkm_sessions.get(key)
+        if cached is not None:
+            return cached
+        # Pages embedded in OpenKM fire many calls at once; let one of them ask OpenKM
+        pending = _openkm_inflight.get(key)
+        if pending is None:
+            break
+        try:
+            return bool(await asyncio.shield(pending))
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+            # The request asking OpenKM went away before the answer came; ask again
+    pending = asyncio.get_running_loop().create_future()
+    _openkm_inflight[key] = pending
+    try:
+        ok = await _check_openkm_session(okm_base, cookie_header)
+    except BaseException:
+        # No answer to share: cancel so the waiters don't read it as a denial
+        pending.cancel()
+        raise
+    finally:
+        _openkm_inflight.pop(key, None)
+    if ok is not None:
+        openkm_sessions.put(key, ok, ttl=None if ok else OPENKM_SESSION_NEGATIVE_TTL)
+    pending.set_result(bool(ok))
+    return bool(ok)
+
+
+@app.on_event("shutdown")
+async def _shutdown_openkm_http():
+    if _openkm_http is not None:
+        await _openkm_http.aclose()
+
+
+async def get_current_user(request: Request, credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> Dict[str, str]:
     # Prefer JWT-based auth
     if credentials and (credentials.scheme or "").lower() == "bearer":
         token = credentials.credentials or ""
@@ -461,14 +2684,10 @@ def get_current_user(request: Request, credentials: Optional[HTTPAuthorizationCr
         cookie_header = request.headers.get("cookie") or request.headers.get("Cookie")
         okm_base = os.environ.get("OPENKM_BASE_URL", "").rstrip("/")
         if cookie_header and okm_base:
-            # Simple session validation by querying a lightweight endpoint
-            try:
-                r = requests.get(f"{okm_base}/services/rest/document/getRootFolder", headers={"Cookie": cookie_header}, timeout=5)
-                if r.status_code == 200:
-                    # We don't have email; use OpenKM user marker
-                    return {"id": "openkm-user", "email": "openkm-user@local", "role": "viewer"}
-            except Exception:
-                pass
+            # Session validation by querying a lightweight endpoint (cached per session)
+            if await openkm_session_is_valid(okm_base, cookie_header):
+                # We don't have email; use OpenKM user marker
+                return {"id": "openkm-user", "email": "openkm-user@local", "role": "viewer"}
     except Exception:
         pass
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
@@ -488,101 +2707,347 @@ async def health():
 @app.post("/community-api/upload")
 async def upload(files: List[UploadFile] = File(...), user: Dict[str, str] = Depends(get_current_user)):
     results = []
-    conn = get_db()
-    cur = conn.cursor()
     for f in files:
-        raw = await f.read()
-        # Persist incoming file to temp for conversion
-        with tempfile.NamedTemporaryFile(delete=False) as tmp_in:
-            tmp_in.write(raw)
-            tmp_in_path = tmp_in.name
-        # Convert everything to a canonical PDF and keep only that
-        try:
-            canonical_pdf_path = ensure_pdf_canonical(tmp_in_path, f.filename, DATA_DIR)
-        finally:
-            try:
-                os.unlink(tmp_in_path)
-            except Exception:
-                pass
-        # Ensure we keep only the new PDF, and use its sanitized name as the stored filename
-        stored_filename = os.path.basename(canonical_pdf_path)
-        # Best-effort upload canonical PDF to OpenKM
-        try:
-            if openkm_client.is_configured():
-                openkm_client.upload_file(canonical_pdf_path)
-        except Exception:
-            pass
+        original_filename = f.filename or "file"
+        # Stream the raw upload to disk; conversion, OCR, translation and embedding run in the ingest workers
+        raw_path = os.path.join(INCOMING_DIR, f"{uuid.uuid4().hex}_{sanitize_filename(os.path.basename(original_filename))}")
+        content_sha256 = await spool_upload(f, raw_path)
+        # Identical bytes already ingested (or in flight): reuse that document instead of reprocessing
+        known = await db_executor.run(find_known_upload, content_sha256)
+        if known is not None:
+            os.remove(raw_path)
+            results.append({
+                "job_id": known.get("job_id"),
+                "id": known.get("id"),
+                "filename": original_filename,
+                "status": known["status"],
+                "duplicate": True,
+            })
+            continue
+        job_id = await db_executor.run(enqueue_ingest_job, raw_path, original_filename, user.get("email"), content_sha256)
+        results.append({"job_id": job_id, "filename": original_filename, "status": "queued", "duplicate": False})
+    return {"uploaded": results}
 
-        # OCR the PDF (always OCR)
-        try:
-            text = ocr_pdf(canonical_pdf_path)
-        except Exception:
-            text = ""
-        # Detect language and translate to English using offline translator if available
-        lang: Optional[str] = None
-        translated: str = text
-        try:
-            if text:
-                lang = detect(text)
-                translated = translate_to_english_offline(text, lang)
-        except Exception:
-            pass
-        cur.execute(
-            "INSERT INTO docs(filename, lang, text, translated) VALUES(?,?,?,?)",
-            (stored_filename, lang or "unknown", text, translated),
-        )
-        doc_id = cur.lastrowid
-        results.append({"id": doc_id, "filename": stored_filename, "lang": lang or "unknown"})
-        # Try to create/update embedding in pgvector
-        try:
-            if translated:
-                model = get_embedder()
-                vec = model.encode([translated])[0]
-                vec = np.asarray(vec, dtype=np.float32)
-                pg = get_pg_conn()
-                if pg is not None:
-                    with pg.cursor() as pc:
-                        pc.execute(
-                            "INSERT INTO doc_embeddings(doc_id, filename, embedding) VALUES(%s,%s,%s) ON CONFLICT (doc_id) DO UPDATE SET embedding=EXCLUDED.embedding",
-                            (doc_id, f.filename, vec.tolist()),
-                        )
-                        pg.commit()
-                    pg.close()
-        except Exception:
-            pass
-    conn.commit()
+
+@app.get("/community-api/jobs/{job_id}")
+@offload(db_executor)
+def get_job(job_id: int, user: Dict[str, str] = Depends(get_current_user)):
+    conn = get_db()
+    row = conn.execute(
+        "SELECT id, status, stage, original_filename, doc_id, attempts, error, created_at, updated_at, COALESCE(duplicate,0) FROM jobs WHERE id = ?",
+        (job_id,),
+    ).fetchone()
     conn.close()
-    return {"uploaded": results}
+    if not row:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "id": row[0],
+        "status": row[1],
+        "stage": row[2],
+        "filename": row[3],
+        "doc_id": row[4],
+        "attempts": row[5],
+        "error": row[6],
+        "created_at": row[7],
+        "updated_at": row[8],
+        "duplicate": bool(row[9]),
+    }
+
+
+# Ranked search: bm25 with per-column weights (filename, text, translated) and keyset
+# pagination on (score, id), so page N costs the same as page 1.
+SEARCH_WEIGHTS = tuple(float(w) for w in os.environ.get("SEARCH_WEIGHTS", "5,1,1").split(","))
+SEARCH_COUNT_CAP = int(os.environ.get("SEARCH_COUNT_CAP", "1000"))
+# Best-matching pages reported per document hit
+SEARCH_PAGE_HITS = int(os.environ.get("SEARCH_PAGE_HITS", "3"))
+
+
+def encode_search_cursor(score: float, doc_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, doc_id]).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_search_cursor(cursor: str):
+    try:
+        score, doc_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(score), int(doc_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _parse_date_bound(value: Optional[str], end: bool = False) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+    # A bare date as upper bound includes that whole day
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed.isoformat()
 
 
 @app.get("/community-api/search")
-async def search(q: str, tag: Optional[str] = None, user: Dict[str, str] = Depends(get_current_user)):
-    conn = get_db()
-    cur = conn.cursor()
-    base_sql = "SELECT d.id, d.filename, d.lang, snippet(docs_fts, 1, '<b>', '</b>', ' … ', 10) as snip_text, snippet(docs_fts, 2, '<b>', '</b>', ' … ', 10) as snip_trans FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid"
-    params: List = []
+@offload(db_executor)
+def search(
+    q: str,
+    tag: Optional[str] = None,
+    lang: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = 25,
+    cursor: Optional[str] = None,
+    count: bool = False,
+    user: Dict[str, str] = Depends(get_current_user),
+):
+    return fts_search(
+        q, tag=tag, lang=lang, since=_parse_date_bound(date_from), until=_parse_date_bound(date_to, end=True),
+        limit=max(1, min(limit, 100)), cursor=cursor, count=count,
+    )
+
+
+def fts_search(
+    q: str,
+    tag: Optional[str] = None,
+    lang: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 25,
+    cursor: Optional[str] = None,
+    count: bool = False,
+) -> Dict:
+    """Ranked FTS page; repeated queries are served from memory until the corpus changes."""
+    return cached_by_generation(
+        search_result_cache,
+        (q, tag, lang, since, until, limit, cursor, count),
+        lambda: _fts_search(q, tag, lang, since, until, limit, cursor, count),
+    )
+
+
+def _fts_search(q, tag, lang, since, until, limit, cursor, count) -> Dict:
+    w_filename, w_text, w_translated = (list(SEARCH_WEIGHTS) + [1.0, 1.0, 1.0])[:3]
+    # Filters are applied inside the FTS query so ranking and paging only see matching rows
+    from_sql = " FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid"
+    filter_params: List = []
     if tag:
-        base_sql += " JOIN doc_tags dt ON dt.doc_id = d.id JOIN tags t ON t.id = dt.tag_id AND t.name = ?"
-        params.append(tag)
-    base_sql += " WHERE docs_fts MATCH ? LIMIT 25"
-    params.append(q)
-    rows = cur.execute(base_sql, tuple(params)).fetchall()
-    conn.close()
-    results = [
-        {
-            "id": r[0],
-            "filename": r[1],
-            "lang": r[2],
-            "snippet_text": r[3],
-            "snippet_translated": r[4],
-        }
-        for r in rows
-    ]
-    return {"results": results}
+        from_sql += " JOIN doc_tags dt ON dt.doc_id = d.id JOIN tags t ON t.id = dt.tag_id AND t.name = ?"
+        filter_params.append(tag)
+    from_sql += " WHERE docs_fts MATCH ?"
+    filter_params.append(q)
+    if lang:
+        from_sql += " AND d.lang = ?"
+        filter_params.append(lang)
+    if since:
+        from_sql += " AND d.created_at >= ?"
+        filter_params.append(since)
+    if until:
+        from_sql += " AND d.created_at < ?"
+        filter_params.append(until)
+
+    ranked_sql = f"SELECT id, score FROM (SELECT d.id AS id, bm25(docs_fts, ?, ?, ?) AS score{from_sql})"
+    params: List = [w_filename, w_text, w_translated] + filter_params
+    if cursor:
+        after_score, after_id = decode_search_cursor(cursor)
+        ranked_sql += " WHERE score > ? OR (score = ? AND id > ?)"
+        params += [after_score, after_score, after_id]
+    ranked_sql += " ORDER BY score, id LIMIT ?"
+    params.append(limit + 1)
+
+    conn = get_db()
+    try:
+        try:
+            ranked = conn.execute(ranked_sql, tuple(params)).fetchall()
+        except sqlite3.OperationalError:
+            raise HTTPException(status_code=400, detail="Invalid search query")
+        has_more = len(ranked) > limit
+        ranked = ranked[:limit]
+        # Snippets only for the rows on this page; from the matching pages where the
+        # terms co-occur on one, from the whole document otherwise
+        snippets: Dict[int, tuple] = {}
+        page_hits = _page_hits(conn, q, [r[0] for r in ranked], w_text, w_translated)
+        if ranked:
+            for r in conn.execute(
+                f"SELECT id, filename, lang FROM docs WHERE id IN ({','.join('?' for _ in ranked)})", [r[0] for r in ranked]
+            ):
+                hits = page_hits.get(r[0])
+                if hits:
+                    snippets[r[0]] = (r[1], r[2], hits[0]["snippet_text"], hits[0]["snippet_translated"])
+            ids = [r[0] for r in ranked if r[0] not in snippets]
+            if ids:
+                for r in conn.execute(
+                    "SELECT d.id, d.filename, d.lang, snippet(docs_fts, 1, '<b>', '</b>', ' … ', 10), snippet(docs_fts, 2, '<b>', '</b>', ' … ', 10)"
+                    f" FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid WHERE docs_fts MATCH ? AND docs_fts.rowid IN ({','.join('?' for _ in ids)})",
+                    (q, *ids),
+                ):
+                    snippets[r[0]] = r[1:]
+        total = None
+        if count:
+            # Approximate: counting stops at SEARCH_COUNT_CAP matches
+            total = conn.execute(
+                f"SELECT count(*) FROM (SELECT d.id{from_sql} LIMIT ?)", (*filter_params, SEARCH_COUNT_CAP)
+            ).fetchone()[0]
+    finally:
+        conn.close()
+    results = []
+    for doc_id, score in ranked:
+        filename, doc_lang, snip_text, snip_trans = snippets.get(doc_id, ("", "", "", ""))
+        results.append({
+            "id": doc_id,
+            "filename": filename,
+            "lang": doc_lang,
+            "score": -score,
+            "snippet_text": snip_text,
+            "snippet_translated": snip_trans,
+            "page": page_hits[doc_id][0]["page"] if page_hits.get(doc_id) else None,
+            "pages": page_hits.get(doc_id, []),
+        })
+    response = {
+        "results": results,
+        "next_cursor": encode_search_cursor(ranked[-1][1], ranked[-1][0]) if has_more and ranked else None,
+    }
+    if count:
+        response["total"] = total
+        response["total_is_lower_bound"] = total >= SEARCH_COUNT_CAP
+    return response
+
+
+def _page_hits(conn: sqlite3.Connection, q: str, doc_ids: List[int], w_text: float, w_translated: float) -> Dict[int, List[Dict]]:
+    """Best-matching pages of each document: {doc_id: [{"page", "snippet_text", "snippet_translated"}]}."""
+    hits: Dict[int, List[Dict]] = {}
+    if not doc_ids or SEARCH_PAGE_HITS <= 0:
+        return hits
+    # A document's pages are inserted together, so its rowid range narrows each FTS lookup to that document
+    bounds = conn.execute(
+        f"SELECT doc_id, MIN(id), MAX(id) FROM doc_pages WHERE doc_id IN ({','.join('?' for _ in doc_ids)}) GROUP BY doc_id",
+        doc_ids,
+    ).fetchall()
+    for doc_id, lo, hi in bounds:
+        try:
+            rows = conn.execute(
+                "SELECT p.page, snippet(doc_pages_fts, 0, '<b>', '</b>', ' … ', 10), snippet(doc_pages_fts, 1, '<b>', '</b>', ' … ', 10)"
+                " FROM doc_pages_fts JOIN doc_pages p ON p.id = doc_pages_fts.rowid"
+                " WHERE doc_pages_fts MATCH ? AND doc_pages_fts.rowid BETWEEN ? AND ? AND p.doc_id = ?"
+                " ORDER BY bm25(doc_pages_fts, ?, ?), p.page LIMIT ?",
+                (q, lo, hi, doc_id, w_text, w_translated, SEARCH_PAGE_HITS),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # e.g. a `filename:` column filter, which page rows don't have
+            return {}
+        if rows:
+            hits[doc_id] = [{"page": r[0], "snippet_text": r[1], "snippet_translated": r[2]} for r in rows]
+    return hits
+
+
+# Hybrid retrieval: lexical (FTS5/bm25) and semantic (passage vectors) run
+# concurrently and are merged per document with weighted reciprocal rank fusion.
+HYBRID_RRF_K = float(os.environ.get("HYBRID_RRF_K", "60"))
+HYBRID_WEIGHT_LEXICAL = float(os.environ.get("HYBRID_WEIGHT_LEXICAL", "1.0"))
+HYBRID_WEIGHT_SEMANTIC = float(os.environ.get("HYBRID_WEIGHT_SEMANTIC", "1.0"))
+HYBRID_CANDIDATES = int(os.environ.get("HYBRID_CANDIDATES", "50"))
+
+
+# Question words that would otherwise dominate an OR query (English, the translation target, and French)
+QUERY_STOPWORDS = frozenset(
+    """
+    about above after again all also and any are because been before being between both but can could did does
+    doing down during each few for from further had has have having her here hers him his how into its just more
+    most not now off once only other our ours out over own same she should some such than that the their theirs
+    them then there these they this those through too under until very was were what when where which while who
+    whom why will with would you your yours
+    aux avec ces dans des elle est ils les leur mais nous par pas pour qui quoi sans ses son sont sur une vous
+    """.split()
+)
+
+
+def query_terms(q: str) -> List[str]:
+    return [t for t in re.findall(r"\w+", q.lower()) if len(t) > 2 and t not in QUERY_STOPWORDS]
+
+
+def _lexical_candidates(q: str, limit: int) -> List[Dict]:
+    # Passed as-is, a question is an implicit AND of every word ("what", "did", ...) and matches
+    # almost nothing; OR-ing the content words lets bm25 rank documents by how many they contain
+    terms = list(dict.fromkeys(query_terms(q)))
+    if not terms:
+        return []
+    try:
+        return fts_search(" OR ".join(f'"{t}"' for t in terms), limit=limit)["results"]
+    except HTTPException:
+        return []
+
+
+def _semantic_candidates(q: str, limit: int) -> List[Dict]:
+    try:
+        return search_passages(q, limit=limit) or []
+    except Exception:
+        return []
+
+
+async def hybrid_retrieve(
+    q: str,
+    limit: int = 10,
+    w_lexical: float = HYBRID_WEIGHT_LEXICAL,
+    w_semantic: float = HYBRID_WEIGHT_SEMANTIC,
+) -> List[Dict]:
+    candidates = max(limit, HYBRID_CANDIDATES)
+    lexical, semantic = await asyncio.gather(
+        db_executor.run(_lexical_candidates, q, candidates),
+        cpu_executor.run(_semantic_candidates, q, candidates),
+    )
+    fused: Dict[int, Dict] = {}
+
+    def entry(doc_id: int) -> Dict:
+        if doc_id not in fused:
+            fused[doc_id] = {
+                "id": doc_id, "filename": "", "lang": None, "score": 0.0,
+                "lexical_rank": None, "semantic_rank": None, "page": None, "snippet": "", "passages": [],
+            }
+        return fused[doc_id]
+
+    for rank, hit in enumerate(lexical, start=1):
+        e = entry(int(hit["id"]))
+        e.update(filename=hit["filename"], lang=hit["lang"], lexical_rank=rank, page=hit.get("page"))
+        e["score"] += w_lexical / (HYBRID_RRF_K + rank)
+        e["snippet"] = hit.get("snippet_translated") or hit.get("snippet_text") or ""
+    # A document's semantic rank is that of its best passage
+    doc_rank = 0
+    for hit in semantic:
+        e = entry(int(hit["doc_id"]))
+        e["passages"].append(hit)
+        if e["semantic_rank"] is None:
+            doc_rank += 1
+            e["semantic_rank"] = doc_rank
+            e["score"] += w_semantic / (HYBRID_RRF_K + doc_rank)
+            e["filename"] = e["filename"] or hit.get("filename", "")
+            e["page"] = hit.get("page") or e["page"]
+            if not e["snippet"]:
+                text = hit.get("text") or ""
+                e["snippet"] = text if len(text) <= 300 else text[:300] + " …"
+    ranked = sorted(fused.values(), key=lambda e: (-e["score"], e["id"]))[:limit]
+    missing = [e["id"] for e in ranked if not e["filename"]]
+    if missing:
+        names = _doc_filenames(missing)
+        for e in ranked:
+            e["filename"] = e["filename"] or names.get(e["id"], "")
+    return ranked
+
+
+@app.get("/community-api/search/hybrid")
+async def hybrid_search(
+    q: str,
+    limit: int = 10,
+    w_lexical: float = HYBRID_WEIGHT_LEXICAL,
+    w_semantic: float = HYBRID_WEIGHT_SEMANTIC,
+    user: Dict[str, str] = Depends(get_current_user),
+):
+    if not q.strip():
+        raise HTTPException(status_code=422, detail="Empty query")
+    ranked = await hybrid_retrieve(q, limit=max(1, min(limit, 50)), w_lexical=w_lexical, w_semantic=w_semantic)
+    return {"results": [{k: v for k, v in e.items() if k != "passages"} for e in ranked]}
 
 
 @app.get("/community-api/docs")
-async def list_docs(user: Dict[str, str] = Depends(get_current_user)):
+@offload(db_executor)
+def list_docs(user: Dict[str, str] = Depends(get_current_user)):
     conn = get_db()
     cur = conn.cursor()
     rows = cur.execute("SELECT id, filename, lang FROM docs ORDER BY id DESC LIMIT 100").fetchall()
@@ -605,7 +3070,8 @@ class NoteCreate(BaseModel):
 
 
 @app.get("/community-api/docs/{doc_id}/notes")
-async def list_notes(doc_id: int, user: Dict[str, str] = Depends(get_current_user)):
+@offload(db_executor)
+def list_notes(doc_id: int, user: Dict[str, str] = Depends(get_current_user)):
     conn = get_db()
     rows = conn.execute(
         "SELECT id, doc_id, author_email, content, created_at FROM notes WHERE doc_id = ? ORDER BY id DESC",
@@ -619,7 +3085,8 @@ async def list_notes(doc_id: int, user: Dict[str, str] = Depends(get_current_use
 
 
 @app.post("/community-api/docs/{doc_id}/notes")
-async def add_note(doc_id: int, body: NoteCreate, user: Dict[str, str] = Depends(get_current_user)):
+@offload(db_executor)
+def add_note(doc_id: int, body: NoteCreate, user: Dict[str, str] = Depends(get_current_user)):
     conn = get_db()
     cur = conn.cursor()
     cur.execute(
@@ -638,7 +3105,8 @@ class TagUpdate(BaseModel):
 
 
 @app.get("/community-api/docs/{doc_id}/tags")
-async def get_tags(doc_id: int, user: Dict[str, str] = Depends(get_current_user)):
+@offload(db_executor)
+def get_tags(doc_id: int, user: Dict[str, str] = Depends(get_current_user)):
     conn = get_db()
     rows = conn.execute(
         """
@@ -653,7 +3121,8 @@ async def get_tags(doc_id: int, user: Dict[str, str] = Depends(get_current_user)
 
 
 @app.post("/community-api/docs/{doc_id}/tags")
-async def add_tag(doc_id: int, body: TagUpdate, user: Dict[str, str] = Depends(get_current_user)):
+@offload(db_executor)
+def add_tag(doc_id: int, body: TagUpdate, user: Dict[str, str] = Depends(get_current_user)):
     conn = get_db()
     cur = conn.cursor()
     # ensure tag
@@ -668,7 +3137,8 @@ async def add_tag(doc_id: int, body: TagUpdate, user: Dict[str, str] = Depends(g
 
 
 @app.delete("/community-api/docs/{doc_id}/tags")
-async def remove_tag(doc_id: int, body: TagUpdate, user: Dict[str, str] = Depends(get_current_user)):
+@offload(db_executor)
+def remove_tag(doc_id: int, body: TagUpdate, user: Dict[str, str] = Depends(get_current_user)):
     conn = get_db()
     tag_row = conn.execute("SELECT id FROM tags WHERE name = ?", (body.name,)).fetchone()
     if tag_row:
@@ -678,9 +3148,75 @@ async def remove_tag(doc_id: int, body: TagUpdate, user: Dict[str, str] = Depend
     return {"ok": True}
 
 
-# Export selected pages (PDF only)
+# Export selected pages (PDF only). Subsets are built with PyMuPDF into the export
+# cache and streamed from an open handle, keyed by (content hash, canonical page ranges).
+EXPORT_CACHE_MAX_BYTES = int(float(os.environ.get("EXPORT_CACHE_MAX_MB", "256")) * 1024 * 1024)
+export_cache = FileCache(os.path.join(DATA_DIR, "cache", "exports"), EXPORT_CACHE_MAX_BYTES, ".pdf")
+_PAGE_SPEC_PART = re.compile(r"^\s*(\d+)\s*(?:-\s*(\d+)\s*)?$")
+
+
+def parse_page_spec(spec: str, page_count: int) -> List[int]:
+    """Parse a spec like `1-3,5,2` into 0-based pages [0, 1, 2, 4]: first-occurrence order, no duplicates."""
+    selected: Dict[int, None] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        m = _PAGE_SPEC_PART.match(part)
+        if not m:
+            raise HTTPException(status_code=400, detail=f"Invalid page range: {part.strip()[:20]}")
+        first = int(m.group(1))
+        last = int(m.group(2) or first)
+        if first < 1 or last < first:
+            raise HTTPException(status_code=400, detail=f"Invalid page range: {part.strip()[:20]}")
+        if last > page_count:
+            raise HTTPException(status_code=400, detail=f"Page {last} out of range (document has {page_count} pages)")
+        for p in range(first - 1, last):
+            selected.setdefault(p)
+    if not selected:
+        raise HTTPException(status_code=400, detail="No pages selected")
+    return list(selected)
+
+
+def page_runs(pages: List[int]) -> List[Tuple[int, int]]:
+    """Consecutive ascending pages collapsed into (first, last) runs, order preserved."""
+    runs: List[Tuple[int, int]] = []
+    for p in pages:
+        if runs and p == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], p)
+        else:
+            runs.append((p, p))
+    return runs
+
+
+def export_pages_cached(src_path: str, content_sha256: str, pages: List[int]) -> str:
+    runs = page_runs(pages)
+    canonical = ",".join(f"{a + 1}-{b + 1}" if b > a else str(a + 1) for a, b in runs)
+    key = hashlib.sha256(f"{content_sha256}:{canonical}".encode("utf-8")).hexdigest()
+    cached = export_cache.get(key)
+    if cached is not None:
+        return cached
+    tmp = export_cache.tmp_path(key)
+    src = fitz.open(src_path, filetype="pdf")
+    out = fitz.open()
+    try:
+        for a, b in runs:
+            out.insert_pdf(src, from_page=a, to_page=b)
+        out.save(tmp, garbage=2, deflate=True)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    finally:
+        out.close()
+        src.close()
+    return export_cache.commit(tmp, key)
+
+
 @app.get("/community-api/docs/{doc_id}/export")
-async def export_pdf(doc_id: int, pages: str, user: Dict[str, str] = Depends(get_current_user)):
+@offload(cpu_executor)
+def export_pdf(doc_id: int, pages: str, user: Dict[str, str] = Depends(get_current_user)):
     conn = get_db()
     row = conn.execute("SELECT filename FROM docs WHERE id = ?", (doc_id,)).fetchone()
     conn.close()
@@ -690,31 +3226,87 @@ async def export_pdf(doc_id: int, pages: str, user: Dict[str, str] = Depends(get
     path = os.path.join(DATA_DIR, filename)
     if not filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Export supported for PDF only")
-    reader = PdfReader(path)
-    writer = PdfWriter()
-    # pages string like "1-3,5"
-    selected = []
-    for part in pages.split(','):
-        part = part.strip()
-        if '-' in part:
-            a, b = part.split('-', 1)
-            try:
-                for p in range(int(a), int(b) + 1):
-                    selected.append(p)
-            except Exception:
-                continue
-        else:
-            try:
-                selected.append(int(part))
-            except Exception:
-                continue
-    for p in selected:
-        if 1 <= p <= len(reader.pages):
-            writer.add_page(reader.pages[p - 1])
-    out_path = os.path.join(DATA_DIR, f"export_{doc_id}.pdf")
-    with open(out_path, "wb") as f:
-        writer.write(f)
-    return FileResponse(out_path, filename=f"document_{doc_id}_export.pdf")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    with fitz.open(path, filetype="pdf") as doc:
+        page_count = len(doc)
+    out_path = export_pages_cached(path, file_sha256(path), parse_page_spec(pages, page_count))
+    return OpenFileResponse(out_path, filename=f"document_{doc_id}_export.pdf")
+
+
+# Page images for the viewer/redaction UI. Widths snap up to a fixed set of buckets
+# so the on-disk cache holds a handful of renditions per page, not one per screen size.
+PAGE_RENDER_BUCKETS = tuple(sorted(int(w) for w in os.environ.get("PAGE_RENDER_BUCKETS", "200,400,800,1200,1600").split(",")))
+PAGE_THUMB_WIDTH = PAGE_RENDER_BUCKETS[0]
+PAGE_CACHE_MAX_BYTES = int(float(os.environ.get("PAGE_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+PRERENDER_THUMBNAILS = os.environ.get("PRERENDER_THUMBNAILS", "0").lower() in ("1", "true", "yes")
+page_image_cache = FileCache(os.path.join(DATA_DIR, "cache", "pages"), PAGE_CACHE_MAX_BYTES, ".png")
+
+
+def render_bucket(width: Optional[int]) -> int:
+    if not width:
+        return PAGE_RENDER_BUCKETS[min(2, len(PAGE_RENDER_BUCKETS) - 1)]
+    return next((b for b in PAGE_RENDER_BUCKETS if b >= width), PAGE_RENDER_BUCKETS[-1])
+
+
+def page_image_key(content_sha256: str, page_no: int, bucket: int) -> str:
+    return f"{content_sha256}-{page_no}-{bucket}"
+
+
+def render_page_png(doc, content_sha256: str, page_no: int, bucket: int) -> str:
+    """Cached PNG of 1-based `page_no` of an open document, `bucket` pixels wide."""
+    key = page_image_key(content_sha256, page_no, bucket)
+    cached = page_image_cache.get(key)
+    if cached is not None:
+        return cached
+    page = doc[page_no - 1]
+    zoom = bucket / page.rect.width
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    tmp = page_image_cache.tmp_path(key)
+    pix.save(tmp, output="png")
+    return page_image_cache.commit(tmp, key)
+
+
+def prerender_thumbnails(path: str) -> int:
+    content_sha256 = file_sha256(path)
+    with fitz.open(path, filetype="pdf") as doc:
+        for page_no in range(1, len(doc) + 1):
+            render_page_png(doc, content_sha256, page_no, PAGE_THUMB_WIDTH)
+        return len(doc)
+
+
+@app.get("/community-api/docs/{doc_id}/pages/{page_no}.png")
+@offload(cpu_executor)
+def page_image(
+    doc_id: int,
+    page_no: int,
+    request: Request,
+    w: Optional[int] = None,
+    thumb: bool = False,
+    user: Dict[str, str] = Depends(get_current_user),
+):
+    conn = get_db()
+    row = conn.execute("SELECT filename FROM docs WHERE id = ?", (doc_id,)).fetchone()
+    conn.close()
+    if not row:
+        raise HTTPException(status_code=404, detail="Document not found")
+    path = os.path.join(DATA_DIR, sanitize_filename(row[0]))
+    if not path.lower().endswith(".pdf") or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    bucket = PAGE_THUMB_WIDTH if thumb else render_bucket(w)
+    content_sha256 = file_sha256(path)
+    etag = f'"{page_image_key(content_sha256[:32], page_no, bucket)}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=86400"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    with fitz.open(path, filetype="pdf") as doc:
+        if not 1 <= page_no <= len(doc):
+            raise HTTPException(status_code=404, detail="Page not found")
+        # Page size in PDF points lets clients map pixel selections back to PDF coordinates
+        rect = doc[page_no - 1].rect
+        headers.update({"X-Page-Count": str(len(doc)), "X-Page-Width": f"{rect.width:.2f}", "X-Page-Height": f"{rect.height:.2f}"})
+        out_path = render_page_png(doc, content_sha256, page_no, bucket)
+    return OpenFileResponse(out_path, media_type="image/png", headers=headers)
 
 
 # Redaction (PDF): expects list of rects per page
@@ -730,8 +3322,56 @@ class RedactRequest(BaseModel):
     rects: List[RedactRect]
 
 
+# Redaction outputs are cached on disk by (content hash, normalized rect set).
+REDACT_CACHE_MAX_BYTES = int(float(os.environ.get("REDACT_CACHE_MAX_MB", "512")) * 1024 * 1024)
+redaction_cache = FileCache(os.path.join(DATA_DIR, "cache", "redacted"), REDACT_CACHE_MAX_BYTES, ".pdf")
+
+
+def redaction_key(content_sha256: str, rects: List[tuple]) -> str:
+    # Order, duplicates and sub-0.01pt jitter don't change the output
+    normalized = sorted({(page, round(r.x0, 2), round(r.y0, 2), round(r.x1, 2), round(r.y1, 2)) for page, r in rects})
+    return hashlib.sha256(f"{content_sha256}:{json.dumps(normalized)}".encode("utf-8")).hexdigest()
+
+
+def redact_pdf_cached(src_path: str, content_sha256: str, rects: List[tuple]) -> Tuple[str, bool]:
+    """Apply (0-based page, fitz.Rect) redactions to a PDF. Returns (output path, whether it was freshly made)."""
+    key = redaction_key(content_sha256, rects)
+    cached = redaction_cache.get(key)
+    if cached is not None:
+        return cached, False
+    by_page: Dict[int, List] = {}
+    for idx, rect in rects:
+        by_page.setdefault(idx, []).append(rect)
+    tmp = redaction_cache.tmp_path(key)
+    doc = fitz.open(src_path, filetype="pdf")
+    try:
+        # Only pages that carry a redaction are rewritten
+        for idx in sorted(by_page):
+            if not 0 <= idx < len(doc):
+                continue
+            page = doc[idx]
+            for rect in by_page[idx]:
+                clipped = fitz.Rect(rect) & page.rect
+                if not clipped.is_empty:
+                    page.add_redact_annot(clipped, fill=(0, 0, 0))
+            page.apply_redactions()
+        # garbage collection drops objects orphaned by the redaction (e.g. replaced images);
+        # level 2 compacts the xref too, level 3's duplicate merging costs seconds on big files
+        doc.save(tmp, garbage=2, deflate=True)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    finally:
+        doc.close()
+    return redaction_cache.commit(tmp, key), True
+
+
 @app.post("/community-api/docs/{doc_id}/redact")
-async def redact_pdf(doc_id: int, body: RedactRequest, user: Dict[str, str] = Depends(get_current_user)):
+@offload(cpu_executor)
+def redact_pdf(doc_id: int, body: RedactRequest, user: Dict[str, str] = Depends(get_current_user)):
     conn = get_db()
     row = conn.execute("SELECT filename FROM docs WHERE id = ?", (doc_id,)).fetchone()
     conn.close()
@@ -741,26 +3381,154 @@ async def redact_pdf(doc_id: int, body: RedactRequest, user: Dict[str, str] = De
     path = os.path.join(DATA_DIR, filename)
     if not filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Redaction supported for PDF only")
-    out_path = os.path.join(DATA_DIR, f"redacted_{doc_id}.pdf")
-    doc = fitz.open(path)
+    rects = [(r.page - 1, fitz.Rect(r.x, r.y, r.x + r.width, r.y + r.height)) for r in body.rects]
+    out_path, fresh = redact_pdf_cached(path, file_sha256(path), rects)
+    # Queue for OpenKM if available (once per distinct redaction)
     try:
-        for r in body.rects:
-            if 1 <= r.page <= len(doc):
-                page = doc[r.page - 1]
-                rect = fitz.Rect(r.x, r.y, r.x + r.width, r.y + r.height)
-                page.add_redact_annot(rect, fill=(0, 0, 0))
-        for p in doc:
-            p.apply_redactions()
-        doc.save(out_path)
-    finally:
-        doc.close()
-    # Best-effort upload to OpenKM if available
+        if fresh:
+            enqueue_openkm_upload(out_path, dst_dir=f"{openkm_client.upload_root}/redacted")
+    except Exception:
+        pass
+    return OpenFileResponse(out_path, filename=f"document_{doc_id}_redacted.pdf")
+
+
+# Redact by match: search terms, preset patterns or literal strings are matched against the word boxes captured at
+# ingest (text layer or OCR), so finding what to redact never re-OCRs a page.
+REDACT_PATTERNS = {
+    "email": r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+",
+    "phone": r"(?<![\w+])(?!\d{4}-\d{2}-\d{2}(?!\d))(?:\+\d{1,3}[ .-]?)?(?:\(\d{1,4}\)[ .-]?)?\d{2,4}(?:[ .-]?\d{2,4}){2,4}(?!\w)",
+    "id": r"\b(?:\d{3}-\d{2}-\d{4}|[A-Z]{0,3}\d{6,}[A-Z]?)\b",
+}
+REDACT_PATTERN_MAX_LEN = 200
+
+
+class MatchRequest(BaseModel):
+    query: Optional[str] = None
+    # Names of REDACT_PATTERNS, or literal strings (matched case-insensitively, never as regexes)
+    patterns: List[str] = []
+    pages: Optional[str] = None
+
+
+def query_regex(q: str) -> Optional[re.Pattern]:
+    """Words and "quoted phrases" of a search query as one case-insensitive pattern (FTS operators dropped)."""
+    alternatives = []
+    for phrase, word in re.findall(r'"([^"]+)"|(\S+)', q):
+        if word and word in ("AND", "OR", "NOT"):
+            continue
+        tokens = re.findall(r"\w+\*?", phrase or re.sub(r"^\w+:", "", word))
+        if tokens:
+            alternatives.append(r"\b" + r"\W+".join(re.escape(t.rstrip("*")) + (r"\w*" if t.endswith("*") else r"\b") for t in tokens))
+    return re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+
+
+def match_patterns(body: MatchRequest) -> List[re.Pattern]:
+    compiled = []
+    if body.query:
+        pattern = query_regex(body.query)
+        if pattern is not None:
+            compiled.append(pattern)
+    for p in body.patterns:
+        if p in REDACT_PATTERNS:
+            compiled.append(re.compile(REDACT_PATTERNS[p]))
+            continue
+        # User input is never compiled as a regex: a crafted one could backtrack for minutes
+        if len(p) > REDACT_PATTERN_MAX_LEN:
+            raise HTTPException(status_code=400, detail="Pattern too long")
+        if p.strip():
+            compiled.append(re.compile(re.escape(p), re.IGNORECASE))
+    if not compiled:
+        raise HTTPException(status_code=422, detail="Give a query or at least one pattern")
+    return compiled
+
+
+def match_word_boxes(words: List[list], patterns: List[re.Pattern]) -> List["fitz.Rect"]:
+    """Rects covering every match on one page: one per line a match spans; partially matched words are covered whole."""
+    if not words:
+        return []
+    starts = []
+    pos = 0
+    for w in words:
+        starts.append(pos)
+        pos += len(w[4]) + 1
+    text = " ".join(w[4] for w in words)
+    # Overlapping matches (a term inside an email, two presets) collapse to one rect
+    rects: Dict[tuple, "fitz.Rect"] = {}
+    for pattern in patterns:
+        for m in pattern.finditer(text):
+            if m.end() <= m.start():
+                continue
+            first = bisect.bisect_right(starts, m.start()) - 1
+            last = bisect.bisect_right(starts, m.end() - 1) - 1
+            by_line: Dict[int, "fitz.Rect"] = {}
+            for w in words[first:last + 1]:
+                r = fitz.Rect(w[:4])
+                by_line[w[5]] = by_line[w[5]] | r if w[5] in by_line else r
+            for r in by_line.values():
+                rects.setdefault(tuple(round(v, 1) for v in r), r)
+    return list(rects.values())
+
+
+def find_doc_matches(doc_id: int, body: MatchRequest) -> Tuple[str, List[tuple], List[int]]:
+    """Returns (PDF path, [(0-based page, fitz.Rect)], 1-based pages that have text but no word boxes)."""
+    patterns = match_patterns(body)
+    conn = get_db()
+    row = conn.execute("SELECT filename FROM docs WHERE id = ?", (doc_id,)).fetchone()
+    stored = {r[0]: r[1:] for r in conn.execute("SELECT page, words, text FROM doc_pages WHERE doc_id = ?", (doc_id,))} if row else {}
+    conn.close()
+    if not row:
+        raise HTTPException(status_code=404, detail="Document not found")
+    filename = sanitize_filename(row[0])
+    path = os.path.join(DATA_DIR, filename)
+    if not filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Redaction supported for PDF only")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    rects: List[tuple] = []
+    unindexed: List[int] = []
+    with fitz.open(path, filetype="pdf") as doc:
+        indexes = parse_page_spec(body.pages, len(doc)) if body.pages else range(len(doc))
+        for idx in indexes:
+            words_blob, page_text = stored.get(idx + 1, (None, None))
+            words = unpack_words(words_blob)
+            if not words:
+                # Older documents: the text layer is cheap to read; scanned pages need a reprocess
+                words = native_page_words(doc[idx])
+                if not words and page_text:
+                    unindexed.append(idx + 1)
+            rects.extend((idx, r) for r in match_word_boxes(words, patterns))
+    return path, rects, unindexed
+
+
+@app.post("/community-api/docs/{doc_id}/matches")
+@offload(cpu_executor)
+def doc_matches(doc_id: int, body: MatchRequest, user: Dict[str, str] = Depends(get_current_user)):
+    """Match rectangles in PDF points, for highlighting hits or reviewing a redaction before applying it."""
+    _, rects, unindexed = find_doc_matches(doc_id, body)
+    return {
+        "rects": [
+            {"page": idx + 1, "x": round(r.x0, 1), "y": round(r.y0, 1), "width": round(r.width, 1), "height": round(r.height, 1)}
+            for idx, r in rects
+        ],
+        "unindexed_pages": unindexed,
+    }
+
+
+@app.post("/community-api/docs/{doc_id}/redact-matches")
+@offload(cpu_executor)
+def redact_matches(doc_id: int, body: MatchRequest, user: Dict[str, str] = Depends(get_current_user)):
+    path, rects, unindexed = find_doc_matches(doc_id, body)
+    if not rects:
+        raise HTTPException(status_code=404, detail="No matches found")
+    out_path, fresh = redact_pdf_cached(path, file_sha256(path), rects)
     try:
-        if openkm_client.is_configured():
-            openkm_client.upload_file(out_path, dst_dir=f"{openkm_client.upload_root}/redacted")
+        if fresh:
+            enqueue_openkm_upload(out_path, dst_dir=f"{openkm_client.upload_root}/redacted")
     except Exception:
         pass
-    return FileResponse(out_path, filename=f"document_{doc_id}_redacted.pdf")
+    headers = {"X-Redacted-Matches": str(len(rects))}
+    if unindexed:
+        headers["X-Unindexed-Pages"] = ",".join(str(p) for p in unindexed)
+    return OpenFileResponse(out_path, filename=f"document_{doc_id}_redacted.pdf", headers=headers)
 
 
 # Image redaction (PNG/JPEG): expects list of rects in image pixel units
@@ -769,7 +3537,8 @@ class ImageRedactRequest(BaseModel):
 
 
 @app.post("/community-api/docs/{doc_id}/redact-image")
-async def redact_image(doc_id: int, body: ImageRedactRequest, user: Dict[str, str] = Depends(get_current_user)):
+@offload(cpu_executor)
+def redact_image(doc_id: int, body: ImageRedactRequest, user: Dict[str, str] = Depends(get_current_user)):
     conn = get_db()
     row = conn.execute("SELECT filename FROM docs WHERE id = ?", (doc_id,)).fetchone()
     conn.close()
@@ -790,14 +3559,16 @@ async def redact_image(doc_id: int, body: ImageRedactRequest, user: Dict[str, st
                 y1 = max(0, int(r.y + r.height))
                 draw.rectangle([(x0, y0), (x1, y1)], fill=(0, 0, 0))
             out_path = os.path.join(DATA_DIR, f"redacted_{doc_id}.png")
-            img.save(out_path, format="PNG")
+            # Replace rather than rewrite in place: the OpenKM outbox may hold a hard link to the previous file
+            tmp_path = f"{out_path}.{uuid.uuid4().hex}.tmp"
+            img.save(tmp_path, format="PNG")
+            os.replace(tmp_path, out_path)
     except Exception:
         raise HTTPException(status_code=500, detail="Image redaction error")
 
-    # Best-effort upload to OpenKM if available
+    # Queue for OpenKM if available
     try:
-        if openkm_client.is_configured():
-            openkm_client.upload_file(out_path, dst_dir=f"{openkm_client.upload_root}/redacted")
+        enqueue_openkm_upload(out_path, dst_dir=f"{openkm_client.upload_root}/redacted")
     except Exception:
         pass
     return FileResponse(out_path, filename=f"document_{doc_id}_redacted.png")
@@ -834,83 +3605,20 @@ async def redact_bytes(
         name = (file.filename or "file").lower()
         is_pdf = (kind or '').lower() == "pdf" or name.endswith(".pdf")
         is_img = (kind or '').lower() == "image" or any(name.endswith(ext) for ext in (".png",".jpg",".jpeg",".bmp",".tif",".tiff"))
-        raw = await file.read()
-        if is_pdf:
-            out_fd = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
-            out_path = out_fd.name; out_fd.close()
-            # Open directly from bytes to avoid tmp input management
-            try:
-                doc = fitz.open(stream=raw, filetype="pdf")
-            except Exception:
-                # Fallback: try to fetch via URL if provided as filename
-                try:
-                    import requests as _r
-                    if file and getattr(file, 'filename', None) and str(file.filename).startswith('http'):
-                        r = _r.get(file.filename, timeout=10)
-                        r.raise_for_status()
-                        doc = fitz.open(stream=r.content, filetype="pdf")
-                    else:
-                        raise
-                except Exception as ex:
-                    raise HTTPException(status_code=400, detail="Input is not a PDF")
-            try:
-                for r in rect_list:
-                    idx = max(0, int(r.page) - 1)
-                    if idx >= len(doc):
-                        continue
-                    page = doc[idx]
-                    # Clamp rectangle within page bounds
-                    pg = page.rect
-                    # If client sent pixel dimensions from the on-screen canvas, scale to PDF coordinates
-                    try:
-                        # Prefer canvas pixel size for accuracy; fallback to on-screen size
-                        px_w = float(page_canvas_w) if page_canvas_w else (float(page_pixels_w) if page_pixels_w else None)
-                        px_h = float(page_canvas_h) if page_canvas_h else (float(page_pixels_h) if page_pixels_h else None)
-                    except Exception:
-                        px_w = px_h = None
-                    sx = (pg.width / px_w) if (px_w and px_w > 0) else 1.0
-                    sy = (pg.height / px_h) if (px_h and px_h > 0) else 1.0
-                    x0 = max(pg.x0, min(pg.x1, r.x * sx))
-                    y0 = max(pg.y0, min(pg.y1, r.y * sy))
-                    x1 = max(pg.x0, min(pg.x1, (r.x + r.width) * sx))
-                    y1 = max(pg.y0, min(pg.y1, (r.y + r.height) * sy))
-                    if x1 > x0 and y1 > y0:
-                        rect = fitz.Rect(x0, y0, x1, y1)
-                        page.add_redact_annot(rect, fill=(0, 0, 0))
-                for p in doc:
-                    p.apply_redactions()
-                doc.save(out_path)
-            finally:
-                try: doc.close()
-                except Exception: pass
-            # Never overwrite originals; optionally upload to OpenKM as a new document
+        if not (is_pdf or is_img):
+            raise HTTPException(status_code=415, detail="Unsupported file type")
+        in_fd = tempfile.NamedTemporaryFile(suffix=os.path.splitext(name)[1], delete=False)
+        in_path = in_fd.name; in_fd.close()
+        try:
+            content_sha256 = await spool_upload(file, in_path)
+            return await cpu_executor.run(
+                _redact_spooled, in_path, content_sha256, file, rect_list, is_pdf, page_canvas_w, page_canvas_h, page_pixels_w, page_pixels_h,
+            )
+        finally:
             try:
-                if openkm_client.is_configured():
-                    openkm_client.upload_file(out_path, dst_dir=f"{openkm_client.upload_root}/redacted")
-            except Exception:
+                os.remove(in_path)
+            except OSError:
                 pass
-            return FileResponse(out_path, filename=(file.filename or "redacted.pdf"))
-        elif is_img:
-            try:
-                img = Image.open(io.BytesIO(raw)).convert("RGB")
-                draw = ImageDraw.Draw(img)
-                for r in rect_list:
-                    x0 = max(0, int(r.x)); y0 = max(0, int(r.y))
-                    x1 = max(0, int(r.x + r.width)); y1 = max(0, int(r.y + r.height))
-                    draw.rectangle([(x0, y0), (x1, y1)], fill=(0, 0, 0))
-                out_fd = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-                out_path = out_fd.name; out_fd.close()
-                img.save(out_path, format="PNG")
-                try:
-                    if openkm_client.is_configured():
-                        openkm_client.upload_file(out_path, dst_dir=f"{openkm_client.upload_root}/redacted")
-                except Exception:
-                    pass
-                return FileResponse(out_path, filename=(file.filename or "redacted.png").rsplit('.',1)[0] + "_redacted.png")
-            except Exception:
-                raise HTTPException(status_code=500, detail="Image redaction error")
-        else:
-            raise HTTPException(status_code=415, detail="Unsupported file type")
     except HTTPException:
         raise
     except Exception as e:
@@ -925,6 +3633,87 @@ async def redact_bytes(
         raise HTTPException(status_code=500, detail=f"Redaction error: {type(e).__name__}: {msg}")
 
 
+def _redact_spooled(in_path: str, content_sha256: str, file: UploadFile, rect_list, is_pdf: bool, page_canvas_w, page_canvas_h, page_pixels_w, page_pixels_h):
+    """Redact a spooled upload; PyMuPDF and PIL read the file from disk rather than from a bytes copy."""
+    if is_pdf:
+        try:
+            doc = fitz.open(in_path, filetype="pdf")
+        except Exception:
+            # Fallback: try to fetch via URL if provided as filename
+            try:
+                import requests as _r
+                if file and getattr(file, 'filename', None) and str(file.filename).startswith('http'):
+                    with _r.get(file.filename, timeout=10, stream=True) as r:
+                        r.raise_for_status()
+                        # iter_content undoes Content-Encoding (gzip, ...); r.raw would spool the compressed bytes
+                        content_sha256 = spool_chunks(r.iter_content(UPLOAD_CHUNK_BYTES), in_path)
+                    doc = fitz.open(in_path, filetype="pdf")
+                else:
+                    raise
+            except Exception:
+                raise HTTPException(status_code=400, detail="Input is not a PDF")
+        rects = []
+        try:
+            # If client sent pixel dimensions from the on-screen canvas, scale to PDF coordinates
+            try:
+                # Prefer canvas pixel size for accuracy; fallback to on-screen size
+                px_w = float(page_canvas_w) if page_canvas_w else (float(page_pixels_w) if page_pixels_w else None)
+                px_h = float(page_canvas_h) if page_canvas_h else (float(page_pixels_h) if page_pixels_h else None)
+            except Exception:
+                px_w = px_h = None
+            for r in rect_list:
+                idx = max(0, int(r.page) - 1)
+                if idx >= len(doc):
+                    continue
+                # Clamp rectangle within page bounds
+                pg = doc[idx].rect
+                sx = (pg.width / px_w) if (px_w and px_w > 0) else 1.0
+                sy = (pg.height / px_h) if (px_h and px_h > 0) else 1.0
+                x0 = max(pg.x0, min(pg.x1, r.x * sx))
+                y0 = max(pg.y0, min(pg.y1, r.y * sy))
+                x1 = max(pg.x0, min(pg.x1, (r.x + r.width) * sx))
+                y1 = max(pg.y0, min(pg.y1, (r.y + r.height) * sy))
+                if x1 > x0 and y1 > y0:
+                    rects.append((idx, fitz.Rect(x0, y0, x1, y1)))
+        finally:
+            try: doc.close()
+            except Exception: pass
+        out_path, fresh = redact_pdf_cached(in_path, content_sha256, rects)
+        # Never overwrite originals; optionally queue for OpenKM as a new document
+        try:
+            if fresh:
+                enqueue_openkm_upload(out_path, dst_dir=f"{openkm_client.upload_root}/redacted")
+        except Exception:
+            pass
+        return OpenFileResponse(out_path, filename=(file.filename or "redacted.pdf"))
+    else:
+        try:
+            with Image.open(in_path) as src_img:
+                img = src_img.convert("RGB")
+            draw = ImageDraw.Draw(img)
+            for r in rect_list:
+                x0 = max(0, int(r.x)); y0 = max(0, int(r.y))
+                x1 = max(0, int(r.x + r.width)); y1 = max(0, int(r.y + r.height))
+                draw.rectangle([(x0, y0), (x1, y1)], fill=(0, 0, 0))
+            out_fd = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
+            out_path = out_fd.name; out_fd.close()
+            try:
+                img.save(out_path, format="PNG")
+                try:
+                    enqueue_openkm_upload(out_path, dst_dir=f"{openkm_client.upload_root}/redacted")
+                except Exception:
+                    pass
+                return OpenFileResponse(out_path, filename=(file.filename or "redacted.png").rsplit('.',1)[0] + "_redacted.png")
+            finally:
+                # The outbox holds its own link and the response its open handle; the temp name can go
+                try:
+                    os.remove(out_path)
+                except OSError:
+                    pass
+        except Exception:
+            raise HTTPException(status_code=500, detail="Image redaction error")
+
+
 # Highlights
 class Highlight(BaseModel):
     page: int
@@ -937,7 +3726,8 @@ class Highlight(BaseModel):
 
 
 @app.get("/community-api/docs/{doc_id}/highlights")
-async def list_highlights(doc_id: int, user: Dict[str, str] = Depends(get_current_user)):
+@offload(db_executor)
+def list_highlights(doc_id: int, user: Dict[str, str] = Depends(get_current_user)):
     conn = get_db()
     rows = conn.execute(
         "SELECT id, page, x, y, width, height, COALESCE(color,''), COALESCE(comment,'') FROM highlights WHERE doc_id = ? ORDER BY id",
@@ -951,7 +3741,8 @@ async def list_highlights(doc_id: int, user: Dict[str, str] = Depends(get_curren
 
 
 @app.post("/community-api/docs/{doc_id}/highlights")
-async def add_highlight(doc_id: int, body: Highlight, user: Dict[str, str] = Depends(get_current_user)):
+@offload(db_executor)
+def add_highlight(doc_id: int, body: Highlight, user: Dict[str, str] = Depends(get_current_user)):
     conn = get_db()
     cur = conn.cursor()
     cur.execute(
@@ -965,7 +3756,8 @@ async def add_highlight(doc_id: int, body: Highlight, user: Dict[str, str] = Dep
 
 
 @app.delete("/community-api/docs/{doc_id}/highlights/{highlight_id}")
-async def delete_highlight(doc_id: int, highlight_id: int, user: Dict[str, str] = Depends(get_current_user)):
+@offload(db_executor)
+def delete_highlight(doc_id: int, highlight_id: int, user: Dict[str, str] = Depends(get_current_user)):
     conn = get_db()
     conn.execute("DELETE FROM highlights WHERE id = ? AND doc_id = ?", (highlight_id, doc_id))
     conn.commit(); conn.close()
@@ -976,109 +3768,225 @@ class QARequest(BaseModel):
     question: str
 
 
-@app.post("/community-api/qa")
-async def qa(body: QARequest, user: Dict[str, str] = Depends(get_current_user)):
-    q = body.question.strip()
-    if not q:
-        raise HTTPException(status_code=422, detail="Empty question")
-    # Retrieve relevant docs via pgvector if available, else FTS
-    contexts: List[Dict[str, str]] = []
-    pg = get_pg_conn()
-    used_pg = False
-    if pg is not None:
-        try:
-            model = get_embedder()
-            qvec = model.encode([q])[0]
-            qvec = np.asarray(qvec, dtype=np.float32)
-            with pg.cursor() as pc:
-                pc.execute(
-                    "SELECT d.id, d.filename FROM doc_embeddings e JOIN docs d ON d.id = e.doc_id ORDER BY e.embedding <-> %s LIMIT 5",
-                    (qvec.tolist(),),
-                )
-                vec_rows = pc.fetchall()
-            used_pg = True
-            for did, fname in vec_rows:
-                contexts.append({"doc_id": str(did), "filename": str(fname)})
-        except Exception:
-            pass
-        finally:
-            try:
-                pg.close()
-            except Exception:
-                pass
-    if not contexts:
-        conn = get_db()
-        rows = conn.execute(
-            "SELECT d.id, d.filename, snippet(docs_fts, 1, '[', ']', ' … ', 12) as snip_text, snippet(docs_fts, 2, '[', ']', ' … ', 12) as snip_trans FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid WHERE docs_fts MATCH ? LIMIT 5",
-            (q,),
-        ).fetchall()
-        conn.close()
-        for r in rows:
-            contexts.append({"doc_id": str(r[0]), "filename": str(r[1]), "snippet_text": r[2] or "", "snippet_translated": r[3] or ""})
+QA_PASSAGES = int(os.environ.get("QA_PASSAGES", "6"))
+QA_CONTEXT_CHARS = int(os.environ.get("QA_CONTEXT_CHARS", "6000"))
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
+OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama3")
+OLLAMA_MAX_INFLIGHT = int(os.environ.get("OLLAMA_MAX_INFLIGHT", "4"))
+OLLAMA_KEEPALIVE = int(os.environ.get("OLLAMA_KEEPALIVE", "8"))
+OLLAMA_CONNECT_TIMEOUT = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", "5"))
+# Maximum gap between two streamed tokens (or total time for a non-streamed answer)
+OLLAMA_READ_TIMEOUT = float(os.environ.get("OLLAMA_READ_TIMEOUT", "120"))
+
+# Retrieved contexts and generated answers are reused for repeated questions
+QA_CACHE_SIZE = int(os.environ.get("QA_CACHE_SIZE", "512"))
+QA_CACHE_TTL = float(os.environ.get("QA_CACHE_TTL", "3600"))
+qa_retrieval_cache = TTLCache(QA_CACHE_SIZE, QA_CACHE_TTL)
+qa_answer_cache = TTLCache(QA_CACHE_SIZE, QA_CACHE_TTL)
+
+_ollama_client: Optional["httpx.AsyncClient"] = None
+_ollama_slots: Optional[asyncio.Semaphore] = None
+
+
+def get_ollama_client() -> "httpx.AsyncClient":
+    """Shared async client so generations reuse keep-alive connections to Ollama."""
+    global _ollama_client, _ollama_slots
+    if httpx is None:
+        raise RuntimeError("httpx is not installed")
+    if _ollama_client is None or _ollama_client.is_closed:
+        _ollama_client = httpx.AsyncClient(
+            base_url=OLLAMA_HOST,
+            limits=httpx.Limits(max_connections=OLLAMA_MAX_INFLIGHT, max_keepalive_connections=OLLAMA_KEEPALIVE),
+            timeout=httpx.Timeout(OLLAMA_READ_TIMEOUT, connect=OLLAMA_CONNECT_TIMEOUT),
+        )
+    if _ollama_slots is None:
+        _ollama_slots = asyncio.Semaphore(OLLAMA_MAX_INFLIGHT)
+    return _ollama_client
+
+
+@app.on_event("shutdown")
+async def _shutdown_ollama_client():
+    if _ollama_client is not None:
+        await _ollama_client.aclose()
+
 
-    # Build context text from stored translated text
+def normalize_question(q: str) -> str:
+    return re.sub(r"\s+", " ", q.lower()).strip().rstrip("?!.").strip()
+
+
+async def qa_contexts(q: str) -> List[Dict]:
+    """Retrieve passages with hybrid (lexical + semantic) search; reused until the corpus changes."""
+    key = normalize_question(q)
+    revision = await db_executor.run(corpus_revision)
+    cached = qa_retrieval_cache.get(key, validate=lambda v: v[0] == revision)
+    if cached is not None:
+        return cached[1]
+    contexts = await _retrieve_qa_contexts(q)
+    qa_retrieval_cache.put(key, (revision, contexts))
+    return contexts
+
+
+def _matching_passages(doc_id: int, terms: List[str], k: int = 2) -> List[Dict]:
+    """Lexical-only hit: keep the passages of the document that mention the question's terms."""
     conn = get_db()
+    row = conn.execute("SELECT translated FROM docs WHERE id = ?", (doc_id,)).fetchone()
+    conn.close()
+    passages = sorted(
+        split_passages([(row[0] if row else "") or ""]),
+        key=lambda p: -sum(p["text"].lower().count(t) for t in terms),
+    )[:k]
+    for p in passages:
+        p["page"] = None
+    return passages
+
+
+async def _retrieve_qa_contexts(q: str) -> List[Dict]:
+    contexts: List[Dict] = []
+    terms = query_terms(q)
+    for hit in await hybrid_retrieve(q, limit=QA_PASSAGES):
+        if len(contexts) >= QA_PASSAGES:
+            break
+        passages = [{"page": p["page"], "text": p["text"]} for p in hit["passages"][:2]]
+        if not passages:
+            passages = await db_executor.run(_matching_passages, hit["id"], terms)
+        for p in passages:
+            contexts.append({
+                "doc_id": str(hit["id"]), "filename": str(hit["filename"]), "page": p["page"], "text": p["text"],
+                "snippet": hit["snippet"],
+            })
+    return contexts[:QA_PASSAGES]
+
+
+def qa_answer_key(q: str, contexts: List[Dict]) -> tuple:
+    passage_ids = tuple(
+        f"{c['doc_id']}:{c.get('page')}:{hashlib.sha1(c['text'].encode('utf-8')).hexdigest()[:16]}" for c in contexts
+    )
+    return (normalize_question(q), passage_ids, OLLAMA_MODEL)
+
+
+def cached_answer(key: tuple) -> Optional[str]:
+    def unchanged(entry) -> bool:
+        return doc_revisions(entry["revisions"]) == entry["revisions"]
+    entry = qa_answer_cache.get(key, validate=unchanged)
+    return entry["answer"] if entry else None
+
+
+def store_answer(key: tuple, contexts: List[Dict], answer: str) -> None:
+    # Remember the source documents' revisions so an edited or deleted source invalidates the answer
+    qa_answer_cache.put(key, {"answer": answer, "revisions": doc_revisions(c["doc_id"] for c in contexts)})
+
+
+def qa_prompt(q: str, contexts: List[Dict]) -> str:
+    # Build a compact context from the retrieved passages
     snippets: List[str] = []
+    used = 0
     for c in contexts:
-        try:
-            row = conn.execute("SELECT translated FROM docs WHERE id = ?", (int(c["doc_id"]),)).fetchone()
-            if row and row[0]:
-                snippets.append(row[0])
-        except Exception:
-            continue
-    conn.close()
+        label = c["filename"] + (f", p. {c['page']}" if c.get("page") else "")
+        block = f"[{label}]\n{c['text']}"
+        if used + len(block) > QA_CONTEXT_CHARS and snippets:
+            break
+        snippets.append(block)
+        used += len(block)
+    context_text = "\n\n".join(snippets)[:QA_CONTEXT_CHARS]
+    return (
+        "You are answering questions grounded strictly in the provided context.\n"
+        "If the answer is not contained in the context, say you don't know.\n\n"
+        f"Question: {q}\n\nContext:\n{context_text}\n\nAnswer:"
+    )
+
 
-    ollama_host = os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
-    ollama_model = os.environ.get("OLLAMA_MODEL", "llama3")
-    answer_text = None
+@app.post("/community-api/qa")
+async def qa(body: QARequest, user: Dict[str, str] = Depends(get_current_user)):
+    q = body.question.strip()
+    if not q:
+        raise HTTPException(status_code=422, detail="Empty question")
+    contexts = await qa_contexts(q)
+    key = qa_answer_key(q, contexts)
+    answer_text = await db_executor.run(cached_answer, key)
+    if answer_text:
+        return {"answer": answer_text, "sources": contexts, "cached": True}
     try:
-        import requests as _rq
-        context_text = "\n\n".join(snippets)[:15000]
-        prompt = (
-            "You are answering questions grounded strictly in the provided context.\n"
-            "If the answer is not contained in the context, say you don't know.\n\n"
-            f"Question: {q}\n\nContext:\n{context_text}\n\nAnswer:"
-        )
-        resp = _rq.post(
-            f"{ollama_host}/api/generate",
-            json={"model": ollama_model, "prompt": prompt, "stream": False},
-            timeout=60,
-        )
+        client = get_ollama_client()
+        async with _ollama_slots:
+            resp = await client.post(
+                "/api/generate", json={"model": OLLAMA_MODEL, "prompt": qa_prompt(q, contexts), "stream": False},
+            )
         if resp.status_code == 200:
             js = resp.json()
             answer_text = js.get("response") or js.get("data") or None
     except Exception:
         answer_text = None
-
     if answer_text:
-        return {"answer": answer_text, "sources": contexts[:5]}
-    # Fallback: return retrieved contexts/snippets only
-    return {"answer": None, "sources": contexts[:5]}
+        await db_executor.run(store_answer, key, contexts, answer_text)
+
+    # Without a generated answer the retrieved contexts are still returned
+    return {"answer": answer_text, "sources": contexts}
+
+
+def sse_event(event: str, data) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+@app.post("/community-api/qa/stream")
+async def qa_stream(body: QARequest, user: Dict[str, str] = Depends(get_current_user)):
+    """Server-sent events: `sources` first, then `token` events as Ollama generates, then `done`."""
+    q = body.question.strip()
+    if not q:
+        raise HTTPException(status_code=422, detail="Empty question")
+    contexts = await qa_contexts(q)
+    key = qa_answer_key(q, contexts)
+    cached = await db_executor.run(cached_answer, key)
+
+    async def events():
+        yield sse_event("sources", contexts)
+        if cached:
+            yield sse_event("token", {"text": cached})
+            yield sse_event("done", {"cached": True})
+            return
+        tokens: List[str] = []
+        try:
+            client = get_ollama_client()
+            async with _ollama_slots:
+                payload = {"model": OLLAMA_MODEL, "prompt": qa_prompt(q, contexts), "stream": True}
+                async with client.stream("POST", "/api/generate", json=payload) as resp:
+                    if resp.status_code != 200:
+                        yield sse_event("error", {"detail": f"Generation failed ({resp.status_code})"})
+                        return
+                    async for line in resp.aiter_lines():
+                        if not line.strip():
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("response"):
+                            tokens.append(chunk["response"])
+                            yield sse_event("token", {"text": chunk["response"]})
+                        if chunk.get("error"):
+                            yield sse_event("error", {"detail": chunk["error"]})
+                            return
+                        if chunk.get("done"):
+                            break
+        except Exception:
+            yield sse_event("error", {"detail": "Answer generation unavailable"})
+            return
+        if tokens:
+            await db_executor.run(store_answer, key, contexts, "".join(tokens))
+        yield sse_event("done", {"cached": False})
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/community-api/search/semantic")
-async def semantic_search(q: str, user: Dict[str, str] = Depends(get_current_user)):
-    pg = get_pg_conn()
-    if pg is None:
-        raise HTTPException(status_code=503, detail="Semantic search not available")
+@offload(cpu_executor)
+def semantic_search(q: str, limit: int = 10, user: Dict[str, str] = Depends(get_current_user)):
     try:
-        model = get_embedder()
-        qvec = model.encode([q])[0]
-        qvec = np.asarray(qvec, dtype=np.float32)
-        with pg.cursor() as pc:
-            pc.execute(
-                "SELECT doc_id, filename FROM doc_embeddings ORDER BY embedding <-> %s LIMIT 10",
-                (qvec.tolist(),),
-            )
-            rows = pc.fetchall()
-        return {"results": [{"doc_id": r[0], "filename": r[1]} for r in rows]}
+        results = search_passages(q, limit=max(1, min(limit, 50)))
     except Exception:
         raise HTTPException(status_code=500, detail="Semantic search error")
-    finally:
-        try:
-            pg.close()
-        except Exception:
-            pass
+    if results is None:
+        raise HTTPException(status_code=503, detail="Semantic search not available")
+    return {"results": results}
 
 
 # Bulk tag operations
@@ -1088,7 +3996,8 @@ class BulkTagUpdate(BaseModel):
 
 
 @app.post("/community-api/docs/tags/bulk")
-async def bulk_add_tag(body: BulkTagUpdate, user: Dict[str, str] = Depends(get_current_user)):
+@offload(db_executor)
+def bulk_add_tag(body: BulkTagUpdate, user: Dict[str, str] = Depends(get_current_user)):
     if not body.doc_ids:
         return {"updated": 0}
     conn = get_db()
@@ -1108,7 +4017,8 @@ async def bulk_add_tag(body: BulkTagUpdate, user: Dict[str, str] = Depends(get_c
 
 
 @app.delete("/community-api/docs/tags/bulk")
-async def bulk_remove_tag(body: BulkTagUpdate, user: Dict[str, str] = Depends(get_current_user)):
+@offload(db_executor)
+def bulk_remove_tag(body: BulkTagUpdate, user: Dict[str, str] = Depends(get_current_user)):
     if not body.doc_ids:
         return {"removed": 0}
     conn = get_db()
@@ -1126,7 +4036,8 @@ async def bulk_remove_tag(body: BulkTagUpdate, user: Dict[str, str] = Depends(ge
 
 # ==================== Auth Endpoints ====================
 @app.post("/community-api/auth/login")
-async def login(body: LoginRequest):
+@offload(cpu_executor)
+def login(body: LoginRequest):
     conn = get_db()
     row = conn.execute(
         "SELECT id, email, password_hash, role, COALESCE(mfa_enabled,0), mfa_secret FROM users WHERE email = ?",
@@ -1163,7 +4074,8 @@ class MFASetupResponse(BaseModel):
 
 
 @app.post("/community-api/auth/mfa/setup")
-async def mfa_setup(user: Dict[str, str] = Depends(get_current_user)):
+@offload(db_executor)
+def mfa_setup(user: Dict[str, str] = Depends(get_current_user)):
     secret = pyotp.random_base32()
     issuer = "CommunityHaqNow"
     uri = pyotp.totp.TOTP(secret).provisioning_uri(name=user["email"], issuer_name=issuer)
@@ -1178,7 +4090,8 @@ class MFAVerifyRequest(BaseModel):
 
 
 @app.post("/community-api/auth/mfa/verify")
-async def mfa_verify(body: MFAVerifyRequest, user: Dict[str, str] = Depends(get_current_user)):
+@offload(db_executor)
+def mfa_verify(body: MFAVerifyRequest, user: Dict[str, str] = Depends(get_current_user)):
     conn = get_db()
     row = conn.execute("SELECT mfa_secret FROM users WHERE email = ?", (user["email"],)).fetchone()
     if not row or not row[0]:
@@ -1193,7 +4106,8 @@ async def mfa_verify(body: MFAVerifyRequest, user: Dict[str, str] = Depends(get_
 
 
 @app.post("/community-api/admin/users")
-async def admin_create_user(body: CreateUserRequest, _: Dict[str, str] = Depends(require_admin)):
+@offload(cpu_executor)
+def admin_create_user(body: CreateUserRequest, _: Dict[str, str] = Depends(require_admin)):
     if body.role not in ("admin", "editor", "viewer"):
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid role")
     password_hash = bcrypt.hashpw(body.password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
@@ -1214,8 +4128,239 @@ async def admin_create_user(body: CreateUserRequest, _: Dict[str, str] = Depends
 
 
 @app.get("/community-api/admin/users")
-async def admin_list_users(_: Dict[str, str] = Depends(require_admin)):
+@offload(db_executor)
+def admin_list_users(_: Dict[str, str] = Depends(require_admin)):
     conn = get_db()
     rows = conn.execute("SELECT id, email, role FROM users ORDER BY id ASC").fetchall()
     conn.close()
     return {"users": [{"id": r[0], "email": r[1], "role": r[2]} for r in rows]}
+
+
+@app.post("/community-api/admin/reindex-passages")
+@offload(cpu_executor)
+def admin_reindex_passages(limit: int = 100, _: Dict[str, str] = Depends(require_admin)):
+    """Build passage embeddings for documents ingested before the passage index existed."""
+    indexed = indexed_passage_doc_ids()
+    if indexed is None:
+        raise HTTPException(status_code=503, detail="Semantic search not available")
+    return {"reindexed": backfill_passages(indexed, limit)}
+
+
+@app.post("/community-api/admin/local-vectors/rebuild")
+@offload(cpu_executor)
+def admin_rebuild_local_vectors(limit: int = 100, _: Dict[str, str] = Depends(require_admin)):
+    if not local_vectors_enabled():
+        raise HTTPException(status_code=409, detail="Local vector index not in use")
+    stats = local_vectors.rebuild()
+    stats["reindexed"] = backfill_passages(local_vectors.indexed_doc_ids(), limit)
+    return stats
+
+
+def reprocess_doc_pages(doc_id: int, pages: Optional[str] = None, force_ocr: bool = False) -> Dict:
+    """Re-extract and re-translate some pages of a document (all of them when `pages` is None,
+    or when the document has no page rows yet), then refresh its joined text and passages."""
+    conn = get_db()
+    row = conn.execute("SELECT filename, lang FROM docs WHERE id = ?", (doc_id,)).fetchone()
+    has_pages = conn.execute("SELECT 1 FROM doc_pages WHERE doc_id = ? LIMIT 1", (doc_id,)).fetchone() is not None
+    conn.close()
+    if not row:
+        raise HTTPException(status_code=404, detail="Document not found")
+    filename, lang = sanitize_filename(row[0]), row[1]
+    path = os.path.join(DATA_DIR, filename)
+    if not filename.lower().endswith(".pdf") or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    with fitz.open(path, filetype="pdf") as doc:
+        page_count = len(doc)
+    if pages is None or not has_pages:
+        indexes = list(range(page_count))
+    else:
+        indexes = parse_page_spec(pages, page_count)
+    layers = extract_pdf_page_layers(path, indexes, force_ocr=force_ocr)
+    texts = [t for t, _ in layers]
+    translations = [translate_to_english_offline(t, lang) for t in texts]
+
+    conn = get_db()
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        changed = store_doc_pages(
+            conn, doc_id, [(i + 1, t, tr) for i, t, tr in zip(indexes, texts, translations)], [w for _, w in layers],
+        )
+        page_texts, page_translations = doc_page_texts(conn, doc_id)
+        if changed:
+            text = "\n\n".join(t for t in page_texts if t).strip()
+            translated = "\n\n".join(t for t in page_translations if t).strip() or text
+            conn.execute("UPDATE docs SET text = ?, translated = ? WHERE id = ?", (text, translated, doc_id))
+        conn.execute("COMMIT")
+    except Exception:
+        try:
+            conn.execute("ROLLBACK")
+        except Exception:
+            pass
+        raise
+    finally:
+        conn.close()
+    passages = None
+    if changed and any(page_translations):
+        # Passages are cut per page, but both vector backends replace a document's set as a whole
+        try:
+            passages = index_doc_passages(doc_id, filename, page_translations)
+            touch_doc_revision(doc_id)
+        except Exception:
+            pass
+    return {"doc_id": doc_id, "pages": [i + 1 for i in indexes], "changed": changed, "passages": passages}
+
+
+@app.post("/community-api/admin/docs/{doc_id}/reprocess")
+@offload(cpu_executor)
+def admin_reprocess_doc(doc_id: int, pages: Optional[str] = None, ocr: bool = False, _: Dict[str, str] = Depends(require_admin)):
+    """Re-extract selected pages (`1-3,7`; the whole document when omitted); `ocr=true` ignores the text layer."""
+    return reprocess_doc_pages(doc_id, pages, force_ocr=ocr)
+
+
+@app.post("/community-api/admin/doc-pages/backfill")
+@offload(cpu_executor)
+def admin_backfill_doc_pages(limit: int = 20, _: Dict[str, str] = Depends(require_admin)):
+    """Split documents ingested before per-page storage into page rows by re-extracting their PDFs."""
+    conn = get_db()
+    ids = [r[0] for r in conn.execute(
+        "SELECT id FROM docs WHERE NOT EXISTS (SELECT 1 FROM doc_pages p WHERE p.doc_id = docs.id) ORDER BY id"
+    )]
+    conn.close()
+    done = 0
+    for doc_id in ids:
+        if done >= limit:
+            break
+        try:
+            reprocess_doc_pages(doc_id)
+        except HTTPException:
+            continue
+        done += 1
+    return {"backfilled": done, "remaining": len(ids) - done}
+
+
+@app.get("/community-api/admin/cache-stats")
+async def admin_cache_stats(_: Dict[str, str] = Depends(require_admin)):
+    return {
+        "qa_retrieval": qa_retrieval_cache.stats(),
+        "qa_answers": qa_answer_cache.stats(),
+        "query_vectors": query_vector_cache.stats(),
+        "search_results": search_result_cache.stats(),
+        "semantic_results": semantic_result_cache.stats(),
+        "openkm_sessions": openkm_sessions.stats(),
+        "redactions": redaction_cache.stats(),
+        "exports": export_cache.stats(),
+        "page_images": page_image_cache.stats(),
+    }
+
+
+@app.get("/community-api/admin/executors")
+async def admin_executor_stats(_: Dict[str, str] = Depends(require_admin)):
+    return {e.name: e.stats() for e in (db_executor, cpu_executor, http_executor)}
+
+
+@app.get("/community-api/admin/openkm/outbox")
+@offload(db_executor)
+def admin_openkm_outbox(status: Optional[str] = None, limit: int = 50, _: Dict[str, str] = Depends(require_admin)):
+    conn = get_db()
+    try:
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM openkm_outbox GROUP BY status").fetchall())
+        oldest = conn.execute("SELECT MIN(created_at) FROM openkm_outbox WHERE status IN ('pending','sending')").fetchone()[0]
+        sql = "SELECT id, status, filename, dst_dir, attempts, next_attempt_at, last_error, okm_path, created_at, updated_at FROM openkm_outbox"
+        params: List = []
+        if status:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(max(1, min(limit, 500)))
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    pause_until = _outbox_state["pause_until"]
+    return {
+        "configured": openkm_client.is_configured(),
+        "senders": len(_outbox_threads),
+        "counts": {k: counts.get(k, 0) for k in ("pending", "sending", "sent", "failed")},
+        "oldest_pending_at": oldest,
+        "consecutive_failures": _outbox_state["failures"],
+        "paused_until": datetime.utcfromtimestamp(pause_until).isoformat() if pause_until > time.time() else None,
+        "items": [
+            {
+                "id": r[0], "status": r[1], "filename": r[2], "dst_dir": r[3], "attempts": r[4],
+                "next_attempt_at": datetime.utcfromtimestamp(r[5]).isoformat() if r[1] == "pending" else None,
+                "last_error": r[6], "okm_path": r[7], "created_at": r[8], "updated_at": r[9],
+            }
+            for r in rows
+        ],
+    }
+
+
+@app.post("/community-api/admin/openkm/outbox/{item_id}/retry")
+@offload(db_executor)
+def admin_retry_openkm_outbox(item_id: int, _: Dict[str, str] = Depends(require_admin)):
+    """Put a failed upload back in the queue with a fresh attempt budget."""
+    conn = get_db()
+    try:
+        cur = conn.execute(
+            "UPDATE openkm_outbox SET status = 'pending', attempts = 0, next_attempt_at = ?, updated_at = ? WHERE id = ? AND status = 'failed'",
+            (time.time(), datetime.utcnow().isoformat(), item_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    if not cur.rowcount:
+        raise HTTPException(status_code=404, detail="No failed outbox item with that id")
+    _outbox_wakeup.set()
+    return {"id": item_id, "status": "pending"}
+
+
+def indexed_passage_doc_ids() -> Optional[set]:
+    if not pgvector_configured():
+        return local_vectors.indexed_doc_ids() if local_vectors_enabled() else None
+    pg = get_pg_conn()
+    if pg is None:
+        return None
+    try:
+        with pg.cursor() as pc:
+            pc.execute("SELECT DISTINCT doc_id FROM doc_passages")
+            return {r[0] for r in pc.fetchall()}
+    finally:
+        release_pg_conn(pg)
+
+
+def backfill_passages(indexed: set, limit: Optional[int] = None) -> int:
+    conn = get_db()
+    try:
+        rows = conn.execute("SELECT id, filename, translated FROM docs ORDER BY id").fetchall()
+        reindexed = 0
+        for doc_id, filename, translated in rows:
+            if limit is not None and reindexed >= limit:
+                break
+            if doc_id in indexed or not translated:
+                continue
+            page_translations = doc_page_texts(conn, doc_id)[1]
+            if page_translations:
+                index_doc_passages(doc_id, filename, page_translations)
+            else:
+                # Documents without page rows have no page boundaries, so these passages carry no page number
+                index_doc_passages(doc_id, filename, [translated], page_numbers=False)
+            touch_doc_revision(doc_id)
+            reindexed += 1
+    finally:
+        conn.close()
+    return reindexed
+
+
+if __name__ == "__main__":
+    import sys
+    # Maintenance: `python app.py rebuild-local-vectors` compacts the local vector
+    # file and embeds any documents missing from it.
+    if sys.argv[1:2] == ["rebuild-local-vectors"]:
+        print(json.dumps(local_vectors.rebuild()))
+        print(json.dumps({"reindexed": backfill_passages(local_vectors.indexed_doc_ids())}))
+    elif sys.argv[1:2] == ["create-vector-indexes"]:
+        # pgvector ANN indexes; safe to re-run, builds without blocking writes
+        print(json.dumps(create_pg_vector_indexes()))
+    else:
+        print("usage: python app.py rebuild-local-vectors | create-vector-indexes")
+        sys.exit(2)
@@ -0,0 +1,152 @@
+"""Long-lived LibreOffice converter process.
+
+Started by the backend's LibreOffice pool, one per pool slot, under an interpreter
+that can import `uno` (Debian/Ubuntu: /usr/bin/python3 with python3-uno). Starts
+its own headless soffice with a private user profile, connects to it over UNO and
+serves JSON-line requests on a Unix socket:
+
+    {"op": "ping"}                               -> {"ok": true}
+    {"op": "convert", "src": ..., "dst": ...}    -> {"ok": true} | {"ok": false, "error": ...}
+
+Exits when soffice dies or the parent process goes away; the pool restarts it.
+Exits with status 3 (EXIT_UNAVAILABLE) when `uno` can't be imported or soffice
+can't be executed, so the pool stops retrying and falls back to one-shot runs.
+The pool starts this process in its own session: soffice shares its process
+group, and killing the group also takes down a soffice stuck inside a UNO call.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+EXIT_UNAVAILABLE = 3
+
+try:
+    import uno  # type: ignore
+    from com.sun.star.beans import PropertyValue  # type: ignore
+    from com.sun.star.connection import NoConnectException  # type: ignore
+except ImportError as e:
+    sys.stderr.write(f"lo_converter: {e}\n")
+    sys.exit(EXIT_UNAVAILABLE)
+
+# First matching document service decides the PDF export filter
+EXPORT_FILTERS = [
+    ("com.sun.star.text.WebDocument", "writer_web_pdf_Export"),
+    ("com.sun.star.text.TextDocument", "writer_pdf_Export"),
+    ("com.sun.star.sheet.SpreadsheetDocument", "calc_pdf_Export"),
+    ("com.sun.star.presentation.PresentationDocument", "impress_pdf_Export"),
+    ("com.sun.star.drawing.DrawingDocument", "draw_pdf_Export"),
+]
+
+
+def prop(name, value):
+    p = PropertyValue()
+    p.Name = name
+    p.Value = value
+    return p
+
+
+def start_office(soffice: str, profile: str, pipe_name: str, timeout: float):
+    try:
+        proc = subprocess.Popen(
+            [
+                soffice, "--headless", "--invisible", "--nologo", "--norestore", "--nodefault", "--nolockcheck",
+                f"-env:UserInstallation={uno.systemPathToFileUrl(os.path.abspath(profile))}",
+                f"--accept=pipe,name={pipe_name};urp;StarOffice.ComponentContext",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError as e:
+        sys.stderr.write(f"lo_converter: cannot run {soffice}: {e}\n")
+        sys.exit(EXIT_UNAVAILABLE)
+    local = uno.getComponentContext()
+    resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            ctx = resolver.resolve(f"uno:pipe,name={pipe_name};urp;StarOffice.ComponentContext")
+            break
+        except NoConnectException:
+            if proc.poll() is not None or time.monotonic() > deadline:
+                proc.kill()
+                raise SystemExit("soffice did not start")
+            time.sleep(0.25)
+    desktop = ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+    return proc, desktop
+
+
+def convert(desktop, src: str, dst: str) -> None:
+    doc = desktop.loadComponentFromURL(
+        uno.systemPathToFileUrl(os.path.abspath(src)), "_blank", 0,
+        (prop("Hidden", True), prop("ReadOnly", True), prop("UpdateDocMode", 0)),
+    )
+    if doc is None:
+        raise RuntimeError("LibreOffice could not open the file")
+    try:
+        filter_name = next((f for service, f in EXPORT_FILTERS if doc.supportsService(service)), "writer_pdf_Export")
+        doc.storeToURL(uno.systemPathToFileUrl(os.path.abspath(dst)), (prop("FilterName", filter_name),))
+    finally:
+        doc.close(True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", required=True)
+    parser.add_argument("--socket", required=True)
+    parser.add_argument("--soffice", default="soffice")
+    parser.add_argument("--start-timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    parent = os.getppid()
+    proc, desktop = start_office(args.soffice, args.profile, f"lo_converter_{os.getpid()}", args.start_timeout)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    if os.path.exists(args.socket):
+        os.remove(args.socket)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(args.socket)
+    server.listen(1)
+    server.settimeout(5.0)
+    try:
+        while proc.poll() is None and os.getppid() == parent:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            with conn:
+                conn.settimeout(None)
+                try:
+                    req = json.loads(conn.makefile("rb").readline() or b"{}")
+                    if req.get("op") == "ping":
+                        desktop.getComponents()
+                        resp = {"ok": True}
+                    elif req.get("op") == "convert":
+                        convert(desktop, req["src"], req["dst"])
+                        resp = {"ok": True}
+                    else:
+                        resp = {"ok": False, "error": "unknown op"}
+                except Exception as e:
+                    resp = {"ok": False, "error": f"{type(e).__name__}: {e}"[:500]}
+                conn.sendall((json.dumps(resp) + "\n").encode("utf-8"))
+    finally:
+        try:
+            desktop.terminate()
+        except Exception:
+            pass
+        try:
+            proc.wait(timeout=10)
+        except Exception:
+            proc.kill()
+        try:
+            os.remove(args.socket)
+        except OSError:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
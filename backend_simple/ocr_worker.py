@@ -0,0 +1,189 @@
+"""Page OCR and its result cache, kept apart from the API module.
+
+The backend's OCR process pool starts its workers with forkserver/spawn (forking a
+threaded server can deadlock a child on a lock some other thread held), so each
+worker imports only this module: Tesseract, PyMuPDF and the OCR cache, not the
+whole API with its database and connection pools. The backend imports the same
+functions for sequential OCR.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+import pytesseract
+from PIL import Image
+
+# Page-level OCR results keyed by a hash of the rendered pixels + DPI + TESS_LANGS,
+# so unchanged pages never hit Tesseract twice. Lives in its own SQLite file (shared
+# by the OCR worker processes) and is trimmed least-recently-used first once it
+# grows past OCR_CACHE_MAX_MB. OCR_CACHE_MAX_MB=0 disables the cache.
+DB_PATH = os.environ.get("COMMUNITY_DB", "/opt/foi-archive/community.db")
+OCR_CACHE_DB = os.environ.get("OCR_CACHE_DB", os.path.join(os.path.dirname(DB_PATH), "ocr_cache.db"))
+OCR_CACHE_MAX_BYTES = int(float(os.environ.get("OCR_CACHE_MAX_MB", "256")) * 1024 * 1024)
+OCR_CACHE_EVICT_EVERY = 50
+
+_ocr_cache_state = {"pid": None, "puts": 0}
+
+
+def _ocr_cache_connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(OCR_CACHE_DB, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    # Schema check once per process
+    if _ocr_cache_state["pid"] != os.getpid():
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_cache (key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_used ON ocr_cache(last_used)")
+        conn.commit()
+        _ocr_cache_state["pid"] = os.getpid()
+        _ocr_cache_state["puts"] = 0
+    return conn
+
+
+def ocr_cache_key(img: Image.Image, tess_langs: str, dpi: Optional[int] = None) -> str:
+    h = hashlib.sha256()
+    h.update(f"{img.mode}:{img.width}x{img.height}:{dpi or '-'}:{tess_langs}:".encode("utf-8"))
+    h.update(img.tobytes())
+    return h.hexdigest()
+
+
+def ocr_cache_get(key: str) -> Optional[str]:
+    if OCR_CACHE_MAX_BYTES <= 0:
+        return None
+    try:
+        conn = _ocr_cache_connect()
+        try:
+            row = conn.execute("SELECT text FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE ocr_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            return row[0]
+        finally:
+            conn.close()
+    except Exception:
+        return None
+
+
+def _ocr_cache_evict(conn: sqlite3.Connection) -> None:
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+    if total <= OCR_CACHE_MAX_BYTES:
+        return
+    # Trim to 90% so we don't evict again on the very next insert
+    excess = total - int(OCR_CACHE_MAX_BYTES * 0.9)
+    victims: List[str] = []
+    for key, size in conn.execute("SELECT key, size FROM ocr_cache ORDER BY last_used ASC"):
+        victims.append(key)
+        excess -= size
+        if excess <= 0:
+            break
+    conn.executemany("DELETE FROM ocr_cache WHERE key = ?", [(k,) for k in victims])
+
+
+def ocr_cache_put(key: str, text: str) -> None:
+    if OCR_CACHE_MAX_BYTES <= 0:
+        return
+    try:
+        conn = _ocr_cache_connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO ocr_cache(key, text, size, last_used) VALUES(?,?,?,?)",
+                (key, text, len(key) + len(text.encode("utf-8")), time.time()),
+            )
+            _ocr_cache_state["puts"] += 1
+            if _ocr_cache_state["puts"] % OCR_CACHE_EVICT_EVERY == 1:
+                _ocr_cache_evict(conn)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception:
+        pass
+
+
+def cached_image_to_string(img: Image.Image, tess_langs: str, dpi: Optional[int] = None) -> str:
+    key = ocr_cache_key(img, tess_langs, dpi)
+    cached = ocr_cache_get(key)
+    if cached is not None:
+        return cached
+    text = (pytesseract.image_to_string(img, lang=tess_langs) or "").strip()
+    ocr_cache_put(key, text)
+    return text
+
+
+def cached_image_to_words(img: Image.Image, tess_langs: str, dpi: Optional[int] = None) -> Tuple[str, List[list]]:
+    """One Tesseract pass for both the page text and its word boxes.
+    Returns (text, [[x0, y0, x1, y1, word, line], ...]) in image pixels, reading order."""
+    key = "words:" + ocr_cache_key(img, tess_langs, dpi)
+    cached = ocr_cache_get(key)
+    if cached is not None:
+        value = json.loads(cached)
+        return value["text"], value["words"]
+    data = pytesseract.image_to_data(img, lang=tess_langs, output_type=pytesseract.Output.DICT)
+    words: List[list] = []
+    lines: Dict[tuple, int] = {}
+    for i, word in enumerate(data["text"]):
+        word = (word or "").strip()
+        if not word:
+            continue
+        line = lines.setdefault((data["block_num"][i], data["par_num"][i], data["line_num"][i]), len(lines))
+        x, y, w, h = data["left"][i], data["top"][i], data["width"][i], data["height"][i]
+        words.append([x, y, x + w, y + h, word, line])
+    # Rebuild the text the way image_to_string lays it out: lines, blank line between paragraphs
+    line_words: Dict[int, List[str]] = {}
+    for w in words:
+        line_words.setdefault(w[5], []).append(w[4])
+    paragraphs: List[List[str]] = []
+    last_par = None
+    for (block, par, _), line in lines.items():
+        if (block, par) != last_par:
+            paragraphs.append([])
+            last_par = (block, par)
+        paragraphs[-1].append(" ".join(line_words[line]))
+    text = "\n\n".join("\n".join(p) for p in paragraphs).strip()
+    ocr_cache_put(key, json.dumps({"text": text, "words": words}, separators=(",", ":")))
+    return text, words
+
+
+def render_page_image(page, dpi: int) -> Image.Image:
+    pix = page.get_pixmap(dpi=dpi)
+    mode = "RGBA" if pix.alpha else "RGB"
+    img = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
+    if mode == "RGBA":
+        img = img.convert("RGB")
+    return img
+
+
+def ocr_page(doc, page_index: int, dpi: int, tess_langs: str) -> Tuple[str, List[list]]:
+    img = render_page_image(doc[page_index], dpi=dpi)
+    try:
+        text, words = cached_image_to_words(img, tess_langs, dpi)
+    finally:
+        img.close()
+    # Word boxes in PDF points, like PyMuPDF's own words
+    scale = 72.0 / dpi
+    return text, [[round(w[0] * scale, 1), round(w[1] * scale, 1), round(w[2] * scale, 1), round(w[3] * scale, 1), w[4], w[5]] for w in words]
+
+
+# Per-process handle reuse so a worker doesn't re-parse the PDF for every page
+_worker_doc: Dict[str, object] = {"key": None, "doc": None}
+
+
+def ocr_page_worker(input_pdf_path: str, page_index: int, dpi: int, tess_langs: str) -> Tuple[str, List[list]]:
+    """Process pool entry point: OCR one page, opening the PDF by path.
+    Errors propagate to the caller's future so a failed page fails the job."""
+    key = (input_pdf_path, os.path.getmtime(input_pdf_path))
+    if _worker_doc["key"] != key:
+        if _worker_doc["doc"] is not None:
+            try:
+                _worker_doc["doc"].close()
+            except Exception:
+                pass
+        _worker_doc["doc"] = None
+        _worker_doc["key"] = None
+        _worker_doc["doc"] = fitz.open(input_pdf_path)
+        _worker_doc["key"] = key
+    return ocr_page(_worker_doc["doc"], page_index, dpi, tess_langs)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: per-request SQLite overhead of list_docs and search.
+
+Compares the legacy connection handling (new sqlite3 connection + WAL pragma on
+every request) with the pooled, pragma-tuned get_db(). Runs the real endpoint
+coroutines against a throwaway database. The search result cache is disabled and
+queries rotate through several terms, so every search really hits SQLite.
+
+Usage: python3 scripts/bench_sqlite.py [--docs 2000] [--iterations 2000]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--docs", type=int, default=2000)
+parser.add_argument("--iterations", type=int, default=2000)
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp(prefix="bench-sqlite-")
+os.environ["COMMUNITY_DB"] = os.path.join(workdir, "community.db")
+os.environ["COMMUNITY_DATA"] = os.path.join(workdir, "data")
+# Cached results would measure a dict lookup, not per-request SQLite overhead
+os.environ["RESULT_CACHE_SIZE"] = "0"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend_simple"))
+
+import app  # noqa: E402
+
+WORDS = "budget ministry contract tender report water health police border customs audit".split()
+
+conn = app.get_db()
+conn.executemany(
+    "INSERT INTO docs(filename, lang, text, translated) VALUES(?,?,?,?)",
+    [
+        (f"doc_{i}.pdf", "en", " ".join(WORDS[(i + j) % len(WORDS)] for j in range(400)), "")
+        for i in range(args.docs)
+    ],
+)
+conn.commit()
+conn.close()
+
+
+def legacy_get_db() -> sqlite3.Connection:
+    conn = sqlite3.connect(app.DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    return conn
+
+
+USER = {"id": "bench", "email": "bench@local", "role": "admin"}
+QUERIES = itertools.cycle(WORDS)
+CASES = {
+    "list_docs": lambda: app.list_docs(user=USER),
+    "search": lambda: app.search(q=next(QUERIES), tag=None, user=USER),
+}
+
+
+def bench(make_call) -> float:
+    loop = asyncio.new_event_loop()
+    try:
+        for _ in range(50):
+            loop.run_until_complete(make_call())
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            loop.run_until_complete(make_call())
+        return (time.perf_counter() - start) / args.iterations * 1e6
+    finally:
+        loop.close()
+
+
+pooled_get_db = app.get_db
+print(f"{'endpoint':<12} {'legacy us/req':>14} {'pooled us/req':>14} {'speedup':>8}")
+for name, make_call in CASES.items():
+    app.get_db = legacy_get_db
+    legacy = bench(make_call)
+    app.get_db = pooled_get_db
+    pooled = bench(make_call)
+    print(f"{name:<12} {legacy:>14.1f} {pooled:>14.1f} {legacy / pooled:>7.2f}x")
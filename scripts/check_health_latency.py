@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Check that /health stays responsive while heavy redactions run.
+
+Starts the API in-process with uvicorn against a throwaway database, fires
+concurrent /community-api/redact-bytes requests on a large generated PDF and
+polls /health meanwhile. Exits non-zero if the p99 /health latency exceeds the
+threshold, i.e. if blocking work leaked back onto the event loop.
+
+Usage: python3 scripts/check_health_latency.py [--pages 400] [--redactions 4] [--max-p99-ms 100]
+"""
+import argparse
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--pages", type=int, default=400)
+parser.add_argument("--redactions", type=int, default=4)
+parser.add_argument("--interval-ms", type=float, default=20)
+parser.add_argument("--max-p99-ms", type=float, default=100)
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp(prefix="health-latency-")
+os.environ["COMMUNITY_DB"] = os.path.join(workdir, "community.db")
+os.environ["COMMUNITY_DATA"] = os.path.join(workdir, "data")
+os.environ["admin_email"] = "latency@example.org"
+os.environ["admin_password"] = "latency-check"
+os.environ.setdefault("INGEST_WORKERS", "1")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend_simple"))
+
+import fitz  # noqa: E402
+import requests  # noqa: E402
+import uvicorn  # noqa: E402
+
+import app  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def make_pdf(path: str, pages: int) -> None:
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        for line in range(40):
+            page.insert_text((48, 60 + line * 18), f"Page {i + 1} line {line}: confidential budget figures 0123456789")
+    doc.save(path)
+    doc.close()
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+port = free_port()
+base = f"http://127.0.0.1:{port}"
+server = uvicorn.Server(uvicorn.Config(app.app, host="127.0.0.1", port=port, log_level="warning"))
+threading.Thread(target=server.run, daemon=True).start()
+for _ in range(100):
+    if server.started:
+        break
+    time.sleep(0.1)
+
+pdf_path = os.path.join(workdir, "heavy.pdf")
+make_pdf(pdf_path, args.pages)
+token = requests.post(
+    f"{base}/community-api/auth/login",
+    json={"email": os.environ["admin_email"], "password": os.environ["admin_password"]},
+    timeout=30,
+).json()["access_token"]
+
+
+def redact(n: int) -> None:
+    # Distinct rects per request so the redaction cache can't answer them
+    rects = "[" + ",".join(f'{{"page":{p},"x":40,"y":{40 + n},"width":300,"height":200}}' for p in range(1, args.pages + 1)) + "]"
+    with open(pdf_path, "rb") as f:
+        r = requests.post(
+            f"{base}/community-api/redact-bytes",
+            headers={"Authorization": f"Bearer {token}"},
+            files={"file": ("heavy.pdf", f, "application/pdf")},
+            data={"rects": rects},
+            timeout=600,
+        )
+    r.raise_for_status()
+
+
+# Baseline with an idle server
+idle = []
+for _ in range(50):
+    t = time.perf_counter()
+    requests.get(f"{base}/health", timeout=10)
+    idle.append((time.perf_counter() - t) * 1000)
+
+workers = [threading.Thread(target=redact, args=(n,)) for n in range(args.redactions)]
+started = time.perf_counter()
+for w in workers:
+    w.start()
+busy = []
+while any(w.is_alive() for w in workers):
+    t = time.perf_counter()
+    requests.get(f"{base}/health", timeout=10)
+    busy.append((time.perf_counter() - t) * 1000)
+    time.sleep(args.interval_ms / 1000)
+elapsed = time.perf_counter() - started
+server.should_exit = True
+
+p99 = percentile(busy, 0.99) if busy else 0.0
+print(f"redactions: {args.redactions} x {args.pages} pages in {elapsed:.1f}s")
+print(f"/health idle: p50 {percentile(idle, 0.5):.1f} ms, p99 {percentile(idle, 0.99):.1f} ms")
+if busy:
+    print(f"/health busy: p50 {percentile(busy, 0.5):.1f} ms, p99 {p99:.1f} ms, max {max(busy):.1f} ms ({len(busy)} probes)")
+if p99 > args.max_p99_ms:
+    print(f"FAIL: p99 {p99:.1f} ms > {args.max_p99_ms:.0f} ms")
+    sys.exit(1)
+print("OK")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Check that ingesting the same document twice is detected as a duplicate.
+
+Runs ingestion jobs in-process against a throwaway database:
+- the same PDF twice, and a copy whose metadata and trailer /ID differ;
+- the same picture twice with different PNG metadata (different upload bytes);
+- a different PDF under an already-used name, which must not touch the first file.
+
+Each repeat must end with duplicate=1 pointing at the first document. Only new
+documents may be queued for OpenKM (the senders are not started, so the queue
+is just counted). Exits non-zero otherwise. Pictures are OCR'd, so the picture
+case is skipped when Tesseract is not installed.
+
+Usage: python3 scripts/check_ingest_dedup.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+workdir = tempfile.mkdtemp(prefix="ingest-dedup-")
+os.environ["COMMUNITY_DB"] = os.path.join(workdir, "community.db")
+os.environ["COMMUNITY_DATA"] = os.path.join(workdir, "data")
+os.environ["OPENKM_BASE_URL"] = "http://127.0.0.1:9"
+os.environ["OPENKM_USERNAME"] = "dedup"
+os.environ["OPENKM_PASSWORD"] = "dedup"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend_simple"))
+
+import fitz  # noqa: E402
+from PIL import Image, PngImagePlugin  # noqa: E402
+
+import app  # noqa: E402
+
+
+def make_pdf(path: str, title: str, text: str = "Dedup check: the same content every time") -> None:
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    doc.set_metadata({"title": title})
+    doc.save(path)
+    doc.close()
+
+
+def make_png(path: str, comment: str) -> None:
+    info = PngImagePlugin.PngInfo()
+    info.add_text("Comment", comment)
+    Image.new("RGB", (200, 100), "white").save(path, pnginfo=info)
+
+
+def ingest(src: str, name: str) -> tuple:
+    raw_path = os.path.join(app.INCOMING_DIR, os.path.basename(src) + ".upload")
+    shutil.copyfile(src, raw_path)
+    job_id = app.enqueue_ingest_job(raw_path, name, "dedup@example.org", app.sha256_file(raw_path))
+    assert app._claim_next_job() == job_id
+    app.run_ingest_job(job_id)
+    conn = app.get_db()
+    row = conn.execute("SELECT status, doc_id, COALESCE(duplicate, 0), error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    conn.close()
+    return row
+
+
+def query(sql: str):
+    conn = app.get_db()
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+paths = {name: os.path.join(workdir, name) for name in ("original.pdf", "retitled.pdf", "other.pdf", "a.png", "b.png")}
+make_pdf(paths["original.pdf"], "first")
+make_pdf(paths["retitled.pdf"], "second")
+make_pdf(paths["other.pdf"], "third", "Different content under a reused name")
+make_png(paths["a.png"], "one")
+make_png(paths["b.png"], "two")
+
+first = ingest(paths["original.pdf"], "report.pdf")
+first_file = os.path.join(app.DATA_DIR, query(f"SELECT filename FROM docs WHERE id = {first[1]}")[0][0])
+first_bytes = open(first_file, "rb").read()
+have_ocr = shutil.which("tesseract") is not None
+image = ingest(paths["a.png"], "scan.png") if have_ocr else None
+repeats = {
+    "same file again": (ingest(paths["original.pdf"], "report.pdf"), first),
+    "other metadata and /ID": (ingest(paths["retitled.pdf"], "report-copy.pdf"), first),
+}
+if have_ocr:
+    repeats["same picture, other PNG metadata"] = (ingest(paths["b.png"], "scan-copy.png"), image)
+else:
+    print("SKIP: picture case (tesseract not installed)")
+other = ingest(paths["other.pdf"], "report.pdf")
+created = [("first", first), ("reused name", other)] + ([("image", image)] if have_ocr else [])
+
+failed = False
+for label, job in created:
+    print(f"{label}: {job}")
+    if job[0] != "done" or job[2]:
+        print(f"FAIL: {label} did not create a document")
+        failed = True
+for label, (job, original) in repeats.items():
+    print(f"{label}: {job}")
+    if job[0] != "done" or job[2] != 1 or job[1] != original[1]:
+        print(f"FAIL: {label} was not recognized as a duplicate of document {original[1]}")
+        failed = True
+docs = query("SELECT id, filename FROM docs ORDER BY id")
+print(f"documents: {docs}")
+if len(docs) != len(created) or len({f for _, f in docs}) != len(created):
+    print(f"FAIL: expected {len(created)} documents with distinct files")
+    failed = True
+if open(first_file, "rb").read() != first_bytes:
+    print("FAIL: the first document's file was overwritten")
+    failed = True
+missing = [f for _, f in docs if not os.path.isfile(os.path.join(app.DATA_DIR, f))]
+if missing:
+    print(f"FAIL: stored files missing: {missing}")
+    failed = True
+queued = query("SELECT COUNT(*) FROM openkm_outbox")[0][0]
+print(f"queued for OpenKM: {queued}")
+if queued != len(docs):
+    print(f"FAIL: expected {len(docs)} OpenKM uploads, one per new document")
+    failed = True
+leftovers = [f for f in os.listdir(app.INCOMING_DIR)]
+if leftovers:
+    print(f"FAIL: files left in the incoming directory: {leftovers}")
+    failed = True
+if failed:
+    sys.exit(1)
+print("OK")
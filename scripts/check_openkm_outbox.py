@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Check that OpenKM uploads are queued, survive an outage and don't slow requests down.
+
+Starts a fake OpenKM (scripts/fake_openkm.py) that is down and slow, runs the API
+in-process against a throwaway database, and redacts a few generated PDFs via
+/community-api/redact-bytes. Then it brings OpenKM back and waits for the outbox
+to drain. Exits non-zero if a request waited on OpenKM, or if any upload was lost
+or duplicated.
+
+Usage: python3 scripts/check_openkm_outbox.py [--files 5] [--max-request-ms 1500] [--timeout 60]
+"""
+import argparse
+import os
+import socket
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--files", type=int, default=5)
+parser.add_argument("--max-request-ms", type=float, default=1500)
+parser.add_argument("--timeout", type=float, default=60)
+args = parser.parse_args()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+scripts_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, scripts_dir)
+from fake_openkm import FakeOpenKM  # noqa: E402
+
+okm = FakeOpenKM("okm-check", "okm-check")
+okm.down, okm.delay = True, 2.0
+okm_port = free_port()
+okm.serve(port=okm_port)
+
+workdir = tempfile.mkdtemp(prefix="openkm-outbox-")
+os.environ.update({
+    "COMMUNITY_DB": os.path.join(workdir, "community.db"),
+    "COMMUNITY_DATA": os.path.join(workdir, "data"),
+    "admin_email": "outbox@example.org",
+    "admin_password": "outbox-check",
+    "INGEST_WORKERS": "1",
+    "OPENKM_BASE_URL": f"http://127.0.0.1:{okm_port}",
+    "OPENKM_USERNAME": "okm-check",
+    "OPENKM_PASSWORD": "okm-check",
+    "OPENKM_OUTBOX_BACKOFF_BASE": "0.2",
+    "OPENKM_OUTBOX_BACKOFF_MAX": "1",
+    "OPENKM_OUTBOX_POLL_SECONDS": "0.2",
+})
+sys.path.insert(0, os.path.join(scripts_dir, "..", "backend_simple"))
+
+import fitz  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app  # noqa: E402
+
+
+def make_pdf(n: int) -> bytes:
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), f"Outbox check document {n}: confidential")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+failed = False
+with TestClient(app.app) as client:
+    token = client.post(
+        "/community-api/auth/login",
+        json={"email": os.environ["admin_email"], "password": os.environ["admin_password"]},
+    ).json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+
+    latencies = []
+    for n in range(args.files):
+        started = time.perf_counter()
+        r = client.post(
+            "/community-api/redact-bytes",
+            headers=auth,
+            files={"file": (f"check{n}.pdf", make_pdf(n), "application/pdf")},
+            data={"rects": '[{"page":1,"x":60,"y":50,"width":200,"height":40}]'},
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        r.raise_for_status()
+    print(f"redactions while OpenKM is down: max {max(latencies):.0f} ms")
+    if max(latencies) > args.max_request_ms:
+        print(f"FAIL: a request took {max(latencies):.0f} ms > {args.max_request_ms:.0f} ms")
+        failed = True
+
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        status = client.get("/community-api/admin/openkm/outbox", headers=auth).json()
+        if status["consecutive_failures"]:
+            break
+        time.sleep(0.2)
+    print(f"during outage: {status['counts']}, consecutive failures {status['consecutive_failures']}")
+    if status["counts"]["sent"] or not status["consecutive_failures"]:
+        print("FAIL: expected queued, unsent uploads while OpenKM is down")
+        failed = True
+
+    okm.down, okm.delay = False, 0.0
+    deadline = time.monotonic() + args.timeout
+    while time.monotonic() < deadline:
+        status = client.get("/community-api/admin/openkm/outbox", headers=auth).json()
+        if status["counts"]["sent"] >= args.files:
+            break
+        time.sleep(0.2)
+    print(f"after recovery: {status['counts']}")
+
+state = okm.state()
+print(f"fake OpenKM: {len(state['docs'])} documents, {state['requests']} requests, {state['connections']} connections")
+if status["counts"]["sent"] != args.files or len(state["docs"]) != args.files:
+    print(f"FAIL: expected {args.files} delivered documents")
+    failed = True
+if any(d["versions"] != 1 for d in state["docs"].values()):
+    print("FAIL: a document was uploaded more than once")
+    failed = True
+leftovers = os.listdir(app.OPENKM_OUTBOX_DIR)
+if leftovers:
+    print(f"FAIL: {len(leftovers)} spooled files left in the outbox")
+    failed = True
+if failed:
+    sys.exit(1)
+print("OK")
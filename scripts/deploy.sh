@@ -97,7 +97,7 @@ ENV PIP_NO_CACHE_DIR=1 PYTHONDONTWRITEBYTECODE=1
 RUN apt-get update && \
     apt-get install -y --no-install-recommends \
       tesseract-ocr tesseract-ocr-ara tesseract-ocr-rus tesseract-ocr-fra \
-      poppler-utils libgl1 libglib2.0-0 curl libreoffice fonts-dejavu-core xz-utils && \
+      poppler-utils libgl1 libglib2.0-0 curl libreoffice python3-uno fonts-dejavu-core xz-utils && \
     rm -rf /var/lib/apt/lists/*
 WORKDIR /app
 COPY requirements.txt /app/requirements.txt
@@ -126,6 +126,7 @@ sentence-transformers
 psycopg2-binary
 pyotp
 requests
+httpx
 argostranslate
 EOF
 fi
@@ -17,6 +17,15 @@ echo "[e2e] Uploading sample images (auto-convert to PDF)..."
 UPLOAD_OUT=$(curl -sf -H "Authorization: Bearer $JWT" -F "files=@/root/arabic-test.png" -F "files=@/root/french-test.png" -F "files=@/root/russian-test.png" "$API/upload")
 echo "$UPLOAD_OUT"
 
+echo "[e2e] Waiting for ingestion jobs..."
+for JID in $(echo "$UPLOAD_OUT" | python3 -c 'import sys,json; print(" ".join(str(i["job_id"]) for i in json.load(sys.stdin).get("uploaded",[]) if i.get("job_id")))'); do
+  for i in $(seq 1 60); do
+    ST=$(curl -sf -H "Authorization: Bearer $JWT" "$API/jobs/$JID" | python3 -c 'import sys,json; print(json.load(sys.stdin).get("status",""))' || true)
+    if [[ "$ST" == "done" || "$ST" == "failed" ]]; then echo "[e2e] job $JID: $ST"; break; fi
+    sleep 5
+  done
+done
+
 echo "[e2e] Fetching docs..."
 DID=$(curl -sf -H "Authorization: Bearer $JWT" "$API/docs" | python3 -c 'import sys,json; d=json.load(sys.stdin).get("docs",[]); print(d[0]["id"] if d else "")')
 if [[ -z "$DID" ]]; then echo "[e2e] ERROR: No doc id"; exit 1; fi
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Minimal fake OpenKM REST server for local testing of the upload outbox.
+
+Implements just what the backend calls:
+
+    POST /services/rest/document/createSimple   (multipart: path, content)
+    POST /services/rest/document/checkin?docPath=...   (multipart: content)
+    GET  /services/rest/document/getProperties?docPath=...
+
+plus test controls:
+
+    GET  /_fake/state                      -> stored documents, request and connection counts
+    POST /_fake/mode?down=1&delay=0.5      -> answer 503 while down; add latency per request
+
+Basic auth is required (any user/password given on the command line).
+
+Usage: python3 scripts/fake_openkm.py [--port 8089] [--user okmAdmin] [--password admin]
+"""
+import argparse
+import base64
+import json
+import threading
+import time
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeOpenKM:
+    def __init__(self, user: str = "okmAdmin", password: str = "admin") -> None:
+        self.auth = "Basic " + base64.b64encode(f"{user}:{password}".encode()).decode()
+        self.docs = {}  # path -> {"size", "versions"}
+        self.requests = 0
+        self.connections = 0
+        self.down = False
+        self.delay = 0.0
+        self.lock = threading.Lock()
+
+    def state(self) -> dict:
+        with self.lock:
+            return {
+                "docs": {p: dict(d) for p, d in self.docs.items()},
+                "requests": self.requests,
+                "connections": self.connections,
+                "down": self.down,
+                "delay": self.delay,
+            }
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8089) -> ThreadingHTTPServer:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with fake.lock:
+                    fake.connections += 1
+
+            def reply(self, code: int, body: str = "", content_type: str = "text/plain") -> None:
+                data = body.encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def multipart(self) -> dict:
+                raw = self.body()
+                msg = BytesParser().parsebytes(b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + raw)
+                return {part.get_param("name", header="content-disposition"): part.get_payload(decode=True) for part in msg.get_payload()}
+
+            def gate(self) -> bool:
+                url = urlparse(self.path)
+                if url.path.startswith("/_fake/"):
+                    return True
+                with fake.lock:
+                    fake.requests += 1
+                    down, delay = fake.down, fake.delay
+                if delay:
+                    time.sleep(delay)
+                if down:
+                    self.body()
+                    self.reply(503, "down")
+                    return False
+                if self.headers.get("Authorization") != fake.auth:
+                    self.body()
+                    self.reply(401, "unauthorized")
+                    return False
+                return True
+
+            def do_GET(self):
+                if not self.gate():
+                    return
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path == "/_fake/state":
+                    self.reply(200, json.dumps(fake.state()), "application/json")
+                elif url.path == "/services/rest/document/getProperties":
+                    path = (query.get("docPath") or [""])[0]
+                    with fake.lock:
+                        exists = path in fake.docs
+                    self.reply(200 if exists else 500, json.dumps({"path": path}) if exists else "PathNotFoundException")
+                else:
+                    self.reply(404, "not found")
+
+            def do_POST(self):
+                if not self.gate():
+                    return
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path == "/_fake/mode":
+                    self.body()
+                    with fake.lock:
+                        if "down" in query:
+                            fake.down = query["down"][0] in ("1", "true")
+                        if "delay" in query:
+                            fake.delay = float(query["delay"][0])
+                    self.reply(200, json.dumps(fake.state()), "application/json")
+                elif url.path == "/services/rest/document/createSimple":
+                    form = self.multipart()
+                    path = (form.get("path") or b"").decode()
+                    with fake.lock:
+                        if path in fake.docs:
+                            self.reply(500, "ItemExistsException: " + path)
+                            return
+                        fake.docs[path] = {"size": len(form.get("content") or b""), "versions": 1}
+                    self.reply(200, json.dumps({"path": path}), "application/json")
+                elif url.path == "/services/rest/document/checkin":
+                    form = self.multipart()
+                    path = (query.get("docPath") or [""])[0]
+                    with fake.lock:
+                        if path not in fake.docs:
+                            self.reply(500, "PathNotFoundException")
+                            return
+                        fake.docs[path] = {"size": len(form.get("content") or b""), "versions": fake.docs[path]["versions"] + 1}
+                    self.reply(200, json.dumps({"path": path}), "application/json")
+                else:
+                    self.body()
+                    self.reply(404, "not found")
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--user", default="okmAdmin")
+    parser.add_argument("--password", default="admin")
+    args = parser.parse_args()
+    FakeOpenKM(args.user, args.password).serve(args.host, args.port)
+    print(f"fake OpenKM on http://{args.host}:{args.port}/")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
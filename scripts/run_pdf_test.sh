@@ -19,17 +19,29 @@ curl -sSL -o /root/sample.pdf https://www.w3.org/WAI/ER/tests/xhtml/testfiles/re
 ls -lh /root/sample.pdf || true
 
 echo "[upload]"
-echo "[upload] status+body:"
-curl -s -w " HTTP:%{http_code}\n" -H "Authorization: Bearer $JWT" -F "files=@/root/sample.pdf" "$API/upload"
-echo
+# Re-uploads of the same bytes are deduplicated, so upload once and reuse the response
 UPLOAD=$(curl -s -H "Authorization: Bearer $JWT" -F "files=@/root/sample.pdf" "$API/upload")
+echo "[upload] body: $UPLOAD"
 
-PDF_ID=$(python3 - <<'PY'
+JOB_ID=$(python3 - <<'PY'
 import sys,json
 up=json.loads(sys.stdin.read()).get('uploaded',[])
-print(next((str(i.get('id')) for i in up if str(i.get('filename','')).lower().endswith('.pdf')), ''))
+print(next((str(i.get('job_id') or '') for i in up if str(i.get('filename','')).lower().endswith('.pdf')), ''))
 PY
 <<< "$UPLOAD")
+PDF_ID=$(python3 -c 'import sys,json; up=json.load(sys.stdin).get("uploaded",[]); print(next((str(i["id"]) for i in up if i.get("id")), ""))' <<< "$UPLOAD")
+if [[ -z "$JOB_ID" && -z "$PDF_ID" ]]; then echo "no job id"; exit 1; fi
+echo "jobid:$JOB_ID"
+
+echo "[wait for ingestion]"
+for i in $(seq 1 60); do
+  if [[ -n "$PDF_ID" ]]; then break; fi
+  JOB=$(curl -s -H "Authorization: Bearer $JWT" "$API/jobs/$JOB_ID")
+  ST=$(python3 -c 'import sys,json; print(json.load(sys.stdin).get("status",""))' <<< "$JOB" || true)
+  if [[ "$ST" == "done" ]]; then PDF_ID=$(python3 -c 'import sys,json; print(json.load(sys.stdin).get("doc_id") or "")' <<< "$JOB"); break; fi
+  if [[ "$ST" == "failed" ]]; then echo "$JOB"; break; fi
+  sleep 5
+done
 if [[ -z "$PDF_ID" ]]; then echo "no pdf id"; exit 1; fi
 echo "pdfid:$PDF_ID"
 